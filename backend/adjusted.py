@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+# Adjusted OHLC and volume, derived from the CSVs' own Adj_Close/Close ratio. The CSVs' Close and
+# Volume are already split-adjusted, so that ratio only carries dividends: it scales the prices,
+# while volume needs no adjustment. The adjusted close is Adj_Close itself.
+adjusted_columns = ['Adj_Open', 'Adj_High', 'Adj_Low', 'Adj_Volume']
+
+
+def adjustment_factor(adj_close, close):
+    """
+    Adj_Close / Close per row; rows where either is missing or zero get NaN rather than inf.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = adj_close / close
+    return np.where(np.isfinite(factor) & (factor > 0), factor, np.nan)
+
+
+def add_adjusted_columns(stock_data):
+    """
+    Append the adjusted columns to a price frame in one vectorized pass: prices are scaled by the
+    factor, and Adj_Volume is Volume, which is split-adjusted already (a dividend changes no share count).
+    """
+    numeric = {col: pd.to_numeric(stock_data[col], errors='coerce').to_numpy(dtype=np.float64)
+               for col in ['Adj_Close', 'Close', 'Open', 'High', 'Low', 'Volume']}
+    factor = adjustment_factor(numeric['Adj_Close'], numeric['Close'])
+    prices = np.column_stack([numeric['Open'], numeric['High'], numeric['Low']]) * factor[:, None]
+    stock_data['Adj_Open'] = prices[:, 0]
+    stock_data['Adj_High'] = prices[:, 1]
+    stock_data['Adj_Low'] = prices[:, 2]
+    stock_data['Adj_Volume'] = numeric['Volume']
+    return stock_data
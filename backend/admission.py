@@ -0,0 +1,142 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, jsonify, request
+
+# Relative cost of one symbol over 1,000 rows of history, per kind of request. The Plotly-figure
+# views and matplotlib PNGs cost orders of magnitude more than slicing volume out of memory.
+graph_costs = {
+    'volume': 0.5,
+    'candlestick': 1,
+    'daily_returns': 1,
+    'rolling_mean': 1,
+    'macd': 2,
+    'rsi': 6,
+    'bollinger_bands': 12,
+    'screen': 0.05,
+    'portfolio': 0.05,
+    'png': 150,
+    'candlestick_png': 250,
+}
+
+# Cost charged for anything served straight from a response cache
+cached_cost = 0.1
+
+
+def estimate_cost(graph_type, symbol_count, history_rows):
+    return graph_costs.get(graph_type, graph_costs['bollinger_bands']) * max(symbol_count, 1) * max(history_rows, 1) / 1000
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, cost):
+        """
+        Spend cost tokens if available; otherwise return the seconds until they will be.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Per-client token buckets charged by estimated cost, plus a cap on the total cost in flight.
+
+    A client over its budget gets 429 and a server already at capacity gets 503, both immediately
+    and with Retry-After, instead of queueing until the request times out.
+    """
+
+    def __init__(self, rate, burst, max_inflight_cost, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_inflight_cost = max_inflight_cost
+        self.max_clients = max_clients
+        self.buckets = OrderedDict()
+        self.inflight_cost = 0.0
+        self.lock = threading.Lock()
+
+    def admit(self, client, cost):
+        """
+        Returns (status, retry_after): status None means admitted and the caller must release(cost).
+        """
+        # A single request larger than the burst would never fit; it needs a full bucket instead
+        cost = min(cost, self.burst)
+        with self.lock:
+            if self.inflight_cost > 0 and self.inflight_cost + cost > self.max_inflight_cost:
+                return 503, 1
+
+            bucket = self.buckets.get(client)
+            if bucket is None:
+                bucket = self.buckets[client] = TokenBucket(self.rate, self.burst)
+                while len(self.buckets) > self.max_clients:
+                    self.buckets.popitem(last=False)
+            self.buckets.move_to_end(client)
+
+            wait = bucket.take(cost)
+            if wait:
+                return 429, max(1, math.ceil(wait))
+            self.inflight_cost += cost
+            return None, 0
+
+    def release(self, cost):
+        with self.lock:
+            self.inflight_cost = max(0.0, self.inflight_cost - min(cost, self.burst))
+
+
+def client_id(trusted_proxies=()):
+    """
+    The bucket a request is charged to: its remote address, or the X-Client-Id header when the
+    request comes from a trusted proxy that tells its own clients apart. The header is ignored
+    from anyone else, who could otherwise rotate it to get a fresh bucket on every request.
+    """
+    address = request.remote_addr or 'unknown'
+    if address in trusted_proxies:
+        return request.headers.get('X-Client-Id') or address
+    return address
+
+
+def install(app, request_cost):
+    """
+    Enforce admission on app. request_cost() returns the current request's estimated cost, or
+    None/0 for requests that are never limited (health checks). Limits come from the environment:
+    RATE_LIMIT_RATE (cost per second per client), RATE_LIMIT_BURST, MAX_INFLIGHT_COST and
+    TRUSTED_CLIENT_ID_PROXIES (comma-separated addresses whose X-Client-Id header is honoured).
+    """
+    controller = AdmissionController(
+        rate=float(os.environ.get('RATE_LIMIT_RATE', 200)),
+        burst=float(os.environ.get('RATE_LIMIT_BURST', 400)),
+        max_inflight_cost=float(os.environ.get('MAX_INFLIGHT_COST', 2000)),
+    )
+    trusted_proxies = {address.strip() for address in os.environ.get('TRUSTED_CLIENT_ID_PROXIES', '').split(',') if address.strip()}
+
+    @app.before_request
+    def admit_request():
+        cost = request_cost()
+        if not cost:
+            return None
+        status, retry_after = controller.admit(client_id(trusted_proxies), cost)
+        if status is not None:
+            message = "Rate limit exceeded." if status == 429 else "Server is at capacity."
+            return jsonify({"error": message, "retry_after": retry_after}), status, {'Retry-After': str(retry_after)}
+        g.admitted_cost = cost
+        return None
+
+    @app.teardown_request
+    def release_request(exc):
+        cost = g.pop('admitted_cost', None)
+        if cost:
+            controller.release(cost)
+
+    return controller
@@ -1,69 +1,497 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
+import functools
 import json
+import numpy as np
 import os
+import threading
+
+import admission
+from adjusted import add_adjusted_columns, adjusted_columns
+from compact import compact_frame
+from compression import CachedBody, ResponseCache, compress_response, negotiate
+from fastjson import dumps, figure, line_trace, px_line_traces
+from indicators import calculate_bollinger_bands, calculate_daily_returns, calculate_macd, calculate_rolling_mean, calculate_rsi
+from materialize import read_indicators, read_screen_table, resample_prices, timeframes
+from panel import Panel, snapshot_version
+from portfolio import date_range, evaluate
+from screener import build_screen_table, screen
+from shared_cache import cache_from_url, default_ttl, get_or_compute, pack_series, unpack_series
+from singleflight import SingleFlight
+from store import data_version, list_symbols, materialized_version, price_columns, read_symbol, snapshot_path, store_directory
 
 app = Flask(__name__)
 CORS(app)
 
-# Load data into a global dictionary (simulate loaded stock data)
+# Negotiated gzip/brotli for every data response that is not already served from the cache
+app.after_request(compress_response)
+
 stock_symbols = ["AAPL", "MSFT", "GOOG", "AMZN", "TSLA", "SPY", "NVDA", "META", "NFLX", "AMD"]
 directory = r"C:\Users\91790\Desktop\Interactive\backend\Financial Data"
-data = {}
 
-# Load CSV data at startup
-for symbol in stock_symbols:
-    filepath = os.path.join(directory, f"{symbol}.csv")
+# COMPACT_PRICES=1 keeps prices as float32 and volume as integers (see compact.py)
+compact_prices = os.environ.get('COMPACT_PRICES') == '1'
+
+# STARTUP_MODE=background starts serving immediately (liveness) and loads data on a thread;
+# /readyz reports when requests can be answered. The default loads everything before serving.
+startup_mode = os.environ.get('STARTUP_MODE', 'eager')
+
+# Aligned dates x symbols panel every endpoint reads from; set once loading finishes
+panel = None
+ready = threading.Event()
+load_error = None
+
+# Whether the store holds indicator tables (materialize.py) built from the loaded data
+materialized = False
+
+
+def load_frames():
+    """
+    Load every symbol into a dict of frames, preferring the columnar store over the raw CSVs.
+    """
+    data = {}
+    if list_symbols(store_directory):
+        for symbol in list_symbols(store_directory):
+            try:
+                stock_data = read_symbol(symbol, store_directory)
+                data[symbol] = compact_frame(stock_data) if compact_prices else stock_data
+            except Exception as e:
+                print(f"Failed to load {symbol}: {e}")
+    else:
+        for symbol in stock_symbols:
+            filepath = os.path.join(directory, f"{symbol}.csv")
+            try:
+                stock_data = pd.read_csv(filepath, skiprows=2, names=['Date', 'Adj_Close', 'Close', 'High', 'Low', 'Open', 'Volume'])
+                stock_data = stock_data[~stock_data['Date'].str.contains('Date', na=False)]
+                stock_data['Date'] = pd.to_datetime(stock_data['Date'].str.split('.').str[0], format='%Y-%m-%d %H:%M:%S')
+                stock_data.set_index('Date', inplace=True)
+                stock_data['Adj_Close'] = pd.to_numeric(stock_data['Adj_Close'], errors='coerce')
+                add_adjusted_columns(stock_data)
+                data[symbol] = compact_frame(stock_data) if compact_prices else stock_data
+            except Exception as e:
+                print(f"Failed to load {symbol}: {e}")
+    return data
+
+
+def load_panel():
+    """
+    Memory-map the panel snapshot written by ingest.py when it matches the store, otherwise build
+    the panel from per-symbol frames. Compact workers map the compact snapshot, so their float32
+    prices are shared page cache like everyone else's rather than private copies.
+    """
+    version = data_version(store_directory)
+    path = snapshot_path(store_directory, compact=compact_prices)
+    if version is not None and snapshot_version(path) == version:
+        return Panel.load(path)
+    return Panel(load_frames(), fields=price_columns + adjusted_columns)
+
+
+def load_data():
+    global panel, load_error, materialized
     try:
-        stock_data = pd.read_csv(filepath, skiprows=2, names=['Date', 'Adj_Close', 'Close', 'High', 'Low', 'Open', 'Volume'])
-        stock_data = stock_data[~stock_data['Date'].str.contains('Date', na=False)]
-        stock_data['Date'] = pd.to_datetime(stock_data['Date'].str.split('.').str[0], format='%Y-%m-%d %H:%M:%S')
-        stock_data.set_index('Date', inplace=True)
-        stock_data['Adj_Close'] = pd.to_numeric(stock_data['Adj_Close'], errors='coerce')
-        data[symbol] = stock_data
+        panel = load_panel()
+        materialized = panel.version is not None and materialized_version(store_directory) == panel.version
+        ready.set()
     except Exception as e:
-        print(f"Failed to load {symbol}: {e}")
+        load_error = str(e)
+        print(f"Failed to load data: {e}")
 
-# Utility Functions
-def calculate_daily_returns(adj_close):
-    return adj_close.pct_change().dropna()
 
-@app.route('/stock/graph', methods=['GET'])
-def stock_graph():
-    symbols = request.args.get('symbols', '').split(',')
-    graph_type = request.args.get('graph_type', 'daily_returns')
+if startup_mode == 'background':
+    threading.Thread(target=load_data, name='load-data', daemon=True).start()
+else:
+    load_data()
 
-    if not symbols or not graph_type:
-        return jsonify({"error": "Please provide 'symbols' and 'graph_type' parameters."}), 400
+# Latest indicator values for every symbol, loaded on the first screen request
+screen_lock = threading.Lock()
+screen_cache = None
+
+
+def screen_tables():
+    """
+    The screen table materialize.py wrote for the loaded data version, or, for a store that was never
+    materialized, one computed from the panel.
+    """
+    global screen_cache
+    with screen_lock:
+        if screen_cache is None and materialized:
+            try:
+                screen_cache = read_screen_table(panel.version, store_directory)
+            except FileNotFoundError:
+                pass
+        if screen_cache is None:
+            screen_cache = build_screen_table(panel)
+        return screen_cache
+
+
+# Finished GET responses keyed by path, query and data version, with their compressed variants
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('RESPONSE_CACHE_SIZE', 256)),
+    max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+)
+
+# Identical requests being computed right now, so concurrent misses share one computation
+in_flight = SingleFlight()
+
+# Optional second tier shared by every worker: SHARED_CACHE=disk:<dir> or redis://host:6379/0,
+# with entries expiring after SHARED_CACHE_TTL seconds and a disk cache capped at SHARED_CACHE_MAX_BYTES
+shared_cache = cache_from_url(
+    os.environ.get('SHARED_CACHE'),
+    ttl=int(os.environ.get('SHARED_CACHE_TTL', default_ttl)),
+    max_bytes=int(os.environ['SHARED_CACHE_MAX_BYTES']) if os.environ.get('SHARED_CACHE_MAX_BYTES') else None,
+)
+
+
+def cache_version():
+    """
+    Data version plus precision, so cached results never outlive a re-ingest or mix float32/float64.
+    """
+    return f"{panel.version}:{'compact' if compact_prices else 'full'}"
+
+
+# The request_key function of each cached view, by endpoint
+request_keys = {}
+
+
+def cache_key():
+    """
+    response_cache key of the current request, built from its parsed form, so query arguments the
+    view ignores (cache busters like _=123) share one entry. None when the view rejects the request.
+    """
+    parsed = request_keys[request.endpoint]()
+    return None if parsed is None else (request.endpoint, parsed, cache_version())
+
+
+def cached(request_key):
+    """
+    Serve a GET view from response_cache, so the body is built and compressed once per entry.
+    request_key() returns what the view's response depends on, or None for a request it rejects,
+    which is run uncached. Identical requests arriving while an entry is being built wait for that
+    one build (single-flight). Error responses are never cached.
+    """
+    def decorator(view):
+        request_keys[view.__name__] = request_key
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = cache_key()
+            if key is None:
+                return view(*args, **kwargs)
+            entry = response_cache.get(key)
+            if entry is None:
+                entry = in_flight.do(key, lambda: build_entry(key, view, args, kwargs))
+            if isinstance(entry, tuple):
+                status, body, mimetype = entry
+                return Response(body, status=status, mimetype=mimetype)
+
+            encoding, body = entry.body(negotiate(request.headers.get('Accept-Encoding')))
+            response = Response(body, mimetype=entry.mimetype)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+            return response
+        return wrapper
+    return decorator
+
+
+def build_entry(key, view, args, kwargs):
+    """
+    Run the view (or fetch its result from the shared tier) and store it in response_cache.
+    Returns the CachedBody, or (status, body, mimetype) for an error response.
+    """
+    # A miss that reaches single-flight after the previous build finished finds that build's entry
+    entry = response_cache.get(key)
+    if entry is not None:
+        return entry
+    errors = []
+
+    def compute():
+        response = app.make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+            errors.append((response.status_code, response.get_data(), response.mimetype))
+            return None
+        return response.mimetype.encode() + b'\n' + response.get_data()
+
+    # Concurrent misses across workers wait for one computation via the shared tier
+    value = get_or_compute(shared_cache, f"response:{key!r}", compute)
+    if value is None:
+        return errors[0]
+    mimetype, _, body = value.partition(b'\n')
+    entry = CachedBody(body, mimetype.decode())
+    response_cache.put(key, entry)
+    return entry
+
+
+@app.before_request
+def require_ready():
+    if request.endpoint in ('healthz', 'readyz') or ready.is_set():
+        return None
+    return jsonify({"error": "Data is still loading."}), 503, {'Retry-After': '1'}
+
+
+def json_body():
+    """
+    The request's JSON object body ({} when there is none); any other JSON value is a ValueError.
+    """
+    body = request.get_json(silent=True)
+    if body is None:
+        return {}
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object")
+    return body
+
+
+def parse_symbols(symbols):
+    """
+    'AAPL,MSFT' or ["AAPL", "MSFT"] -> ['AAPL', 'MSFT']; anything else is a ValueError.
+    """
+    if isinstance(symbols, str):
+        return [symbol for symbol in symbols.split(',') if symbol]
+    if isinstance(symbols, list) and all(isinstance(symbol, str) for symbol in symbols):
+        return symbols
+    raise ValueError("'symbols' must be a comma-separated string or a list of strings")
+
+
+def spec_cost(view, symbols):
+    if not isinstance(view, str):
+        view = None
+    if isinstance(symbols, str):
+        symbols = symbols.split(',')
+    symbol_count = len(symbols) if isinstance(symbols, list) else 1
+    return admission.estimate_cost(view, symbol_count, len(panel.dates))
+
+
+def batch_spec_cost(spec):
+    try:
+        if response_cache.get(view_spec(spec)[0]) is not None:
+            return admission.cached_cost
+    except ValueError:
+        # Rejected by the view without any work
+        return admission.cached_cost
+    return spec_cost(spec.get('view') or spec.get('graph_type') or 'daily_returns', spec.get('symbols', spec.get('symbol', '')))
+
+
+def request_cost():
+    """
+    Estimated cost of the current request for admission control: symbols x history x graph type,
+    or next to nothing when the response is already cached.
+    """
+    if request.endpoint in request_keys:
+        key = cache_key()
+        if key is not None and response_cache.get(key) is not None:
+            return admission.cached_cost
+    if request.endpoint == 'stock_graph':
+        return spec_cost(request.args.get('graph_type', 'daily_returns'), request.args.get('symbols', ''))
+    if request.endpoint == 'stock_screen':
+        return admission.estimate_cost('screen', len(panel.symbols), len(panel.dates))
+    if request.endpoint == 'stock_batch':
+        try:
+            specs = json_body().get('requests')
+        except ValueError:
+            return admission.cached_cost
+        if not isinstance(specs, list):
+            return admission.cached_cost
+        return sum(batch_spec_cost(spec) for spec in specs if isinstance(spec, dict)) or admission.cached_cost
+    if request.endpoint == 'stock_portfolio':
+        try:
+            body = json_body()
+        except ValueError:
+            return admission.cached_cost
+        weights = body.get('weights')
+        portfolios = len(weights) if isinstance(weights, list) and weights and isinstance(weights[0], list) else 1
+        return spec_cost('portfolio', body.get('symbols', '')) * portfolios
+    return None
+
+
+# Registered after require_ready so costs are only estimated once the panel is loaded
+admission.install(app, request_cost)
+
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """
+    Liveness: the process is up and serving, whether or not data has loaded.
+    """
+    return jsonify({"status": "ok"})
+
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """
+    Readiness: data is loaded and the data endpoints can answer.
+    """
+    if ready.is_set():
+        return jsonify({"status": "ready", "symbols": len(panel.symbols), "version": panel.version})
+    if load_error:
+        return jsonify({"status": "failed", "error": load_error}), 503
+    return jsonify({"status": "loading"}), 503, {'Retry-After': '1'}
+
+
+graph_types = ['daily_returns', 'rolling_mean', 'bollinger_bands', 'rsi', 'macd']
+
+# Views drawn from one symbol's daily OHLC/volume rather than indicator graphs
+single_symbol_views = ['candlestick', 'volume']
+
+# Tunable parameters per graph type; anything not given falls back to these
+default_params = {
+    'daily_returns': {},
+    'rolling_mean': {'window': 20},
+    'bollinger_bands': {'window': 20},
+    'rsi': {'window': 14},
+    'macd': {'short_window': 12, 'long_window': 26, 'signal_window': 9},
+    'candlestick': {},
+    'volume': {},
+}
+
+
+def graph_params(graph_type, given):
+    """
+    Merge request parameters over the defaults for a graph type, rejecting unknown values and windows
+    that are not positive or longer than the loaded history.
+    """
+    params = dict(default_params[graph_type])
+    for key, value in given.items():
+        if key not in params:
+            raise ValueError(f"Unknown parameter '{key}' for {graph_type}")
+        try:
+            params[key] = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Parameter '{key}' must be an integer")
+        if params[key] < 1:
+            raise ValueError(f"Parameter '{key}' must be positive")
+        if params[key] > len(panel.dates):
+            raise ValueError(f"Parameter '{key}' cannot exceed the history length ({len(panel.dates)} rows)")
+    return params
+
+
+class Intermediates:
+    """
+    Per-request memo so every chart in a batch shares price slices and indicator series.
+    """
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key, compute):
+        if key not in self.values:
+            self.values[key] = compute()
+        return self.values[key]
+
+    def indicator(self, key, compute):
+        """
+        A tuple of indicator Series, also fetched from / stored in the shared tier when configured.
+        """
+        if shared_cache is None:
+            return self.get(key, compute)
+        cache_key = f"indicator:{cache_version()}:{':'.join(map(str, key))}"
+        return self.get(key, lambda: unpack_series(get_or_compute(shared_cache, cache_key, lambda: pack_series(*compute()))))
+
+    def stored(self, symbols, timeframe, columns):
+        """
+        Default-parameter indicator columns for each symbol read from the materialized tables, or
+        None when any symbol has no table for the loaded data (the caller then computes them).
+        """
+        if not materialized:
+            return None
+        tables = [stored_indicators(symbol, timeframe, panel.version) for symbol in symbols]
+        if any(table is None for table in tables):
+            return None
+        return [tuple(table[col] for col in columns) for table in tables]
+
+    def prices(self, symbol, timeframe='D'):
+        if timeframe == 'D':
+            return self.get(('Adj_Close', symbol), lambda: panel.series('Adj_Close', symbol))
+        return self.get(('Adj_Close', symbol, timeframe), lambda: resample_prices(self.prices(symbol), timeframe))
+
+    def frame(self, symbols, timeframe='D'):
+        if timeframe == 'D':
+            return self.get(('Adj_Close', tuple(symbols)), lambda: panel.frame('Adj_Close', symbols))
+        return self.get(('Adj_Close', tuple(symbols), timeframe), lambda: pd.DataFrame({symbol: self.prices(symbol, timeframe) for symbol in symbols}))
+
+
+@functools.lru_cache(maxsize=4096)
+def stored_indicators(symbol, timeframe, version):
+    """
+    A symbol's memory-mapped indicator table built from the loaded data version, or None when there
+    is none (a re-ingest since this worker loaded its panel removes it, and the caller computes).
+    """
+    try:
+        return read_indicators(symbol, timeframe, version, store_directory)
+    except FileNotFoundError:
+        return None
 
-    # Validate symbols
-    valid_symbols = [symbol for symbol in symbols if symbol in data]
-    if not valid_symbols:
-        return jsonify({"error": "No valid stock symbols provided."}), 400
 
-    adj_close = pd.DataFrame({symbol: data[symbol]['Adj_Close'] for symbol in valid_symbols})
+def has_gaps(frame):
+    """
+    Whether any column is missing values between its first and last valid row. Rolling over such a
+    frame differs from rolling over each symbol's own rows, so stored tables cannot stand in for it.
+    """
+    valid = frame.notna().to_numpy()
+    started = np.maximum.accumulate(valid, axis=0)
+    not_ended = np.maximum.accumulate(valid[::-1], axis=0)[::-1]
+    return bool((started & not_ended & ~valid).any())
 
-    fig = None  # Placeholder for the Plotly figure
+
+def line_figure(frame, value_label, title):
+    """
+    px.line-style figure (one trace per column) built straight from the frame's arrays.
+    """
+    columns = {symbol: frame[symbol].to_numpy() for symbol in frame.columns}
+    return figure(px_line_traces(frame.index.values, columns, value_label), title, 'Date', value_label,
+                  xaxis={'anchor': 'y', 'domain': [0.0, 1.0]}, yaxis={'anchor': 'x', 'domain': [0.0, 1.0]},
+                  legend={'title': {'text': 'variable'}, 'tracegroupgap': 0})
+
+
+def build_graph(symbols, graph_type, params, shared, timeframe='D'):
+    """
+    Build the Plotly figure for one graph type as a JSON-ready dict.
+
+    With the default parameters the indicator series are read from the tables materialize.py
+    wrote at ingest; other parameters (or a store without tables) compute them here.
+
+    daily_returns, rolling_mean and macd skip Plotly's figure objects and keep NumPy arrays for
+    fastjson.dumps to write directly; the other types still go through plotly.graph_objects.
+    """
+    default = params == default_params[graph_type]
+
+    def indicators(symbol, name, columns, compute):
+        stored = shared.stored([symbol], timeframe, columns) if default else None
+        if stored is not None:
+            return stored[0]
+        return shared.indicator((name, symbol, timeframe) + tuple(params.values()), compute)
 
     if graph_type == 'daily_returns':
-        returns = adj_close.pct_change().dropna()
-        fig = px.line(returns, labels={'value': 'Daily Return', 'index': 'Date'}, title='Daily Returns for Selected Symbols')
+        returns = shared.get(('daily_returns', tuple(symbols), timeframe), lambda: calculate_daily_returns(shared.frame(symbols, timeframe)))
+        return line_figure(returns, 'Daily Return', 'Daily Returns for Selected Symbols')
 
     elif graph_type == 'rolling_mean':
-        sma = adj_close.rolling(window=20).mean()
-        fig = px.line(sma, labels={'value': 'Rolling Mean', 'index': 'Date'}, title='Rolling Mean (20-day) for Selected Symbols')
+        window = params['window']
+        stored = shared.stored(symbols, timeframe, ['rolling_mean']) if default else None
+        if stored is not None and not has_gaps(shared.frame(symbols, timeframe)):
+            sma = pd.DataFrame({symbol: series for symbol, (series,) in zip(symbols, stored)})
+        else:
+            sma = shared.get(('rolling_mean', tuple(symbols), window, timeframe), lambda: calculate_rolling_mean(shared.frame(symbols, timeframe), window))
+        return line_figure(sma, 'Rolling Mean', f'Rolling Mean ({window}-day) for Selected Symbols')
+
+    elif graph_type == 'macd':
+        traces = []
+        windows = (params['short_window'], params['long_window'], params['signal_window'])
+        for symbol in symbols:
+            macd, signal = indicators(symbol, 'macd', ['macd', 'macd_signal'], lambda: calculate_macd(shared.prices(symbol, timeframe), *windows))
+            traces.append(line_trace(macd.index.values, macd.to_numpy(), f'{symbol} MACD'))
+            traces.append(line_trace(signal.index.values, signal.to_numpy(), f'{symbol} Signal'))
+
+        return figure(traces, "MACD (Moving Average Convergence Divergence)", "Date", "Value")
+
+    # Plotly is only imported by the first request that needs a figure object
+    import plotly.graph_objects as go
 
-    elif graph_type == 'bollinger_bands':
+    if graph_type == 'bollinger_bands':
         fig = go.Figure()
-        for symbol in valid_symbols:
-            series = adj_close[symbol]
-            sma = series.rolling(window=20).mean()
-            std = series.rolling(window=20).std()
-            upper_band = sma + (2 * std)
-            lower_band = sma - (2 * std)
+        for symbol in symbols:
+            series = shared.prices(symbol, timeframe)
+            sma, upper_band, lower_band = indicators(symbol, 'bollinger_bands', ['rolling_mean', 'bollinger_upper', 'bollinger_lower'],
+                                                     lambda: calculate_bollinger_bands(series, params['window']))
 
             fig.add_trace(go.Scatter(x=series.index, y=series, mode='lines', name=f'{symbol} Price'))
             fig.add_trace(go.Scatter(x=sma.index, y=sma, mode='lines', name=f'{symbol} SMA'))
@@ -74,42 +502,294 @@ def stock_graph():
 
     elif graph_type == 'rsi':
         fig = go.Figure()
-        for symbol in valid_symbols:
-            series = adj_close[symbol]
-            delta = series.diff(1)
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
-            avg_gain = gain.rolling(window=14).mean()
-            avg_loss = loss.rolling(window=14).mean()
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
+        for symbol in symbols:
+            rsi, = indicators(symbol, 'rsi', ['rsi'], lambda: (calculate_rsi(shared.prices(symbol, timeframe), params['window']),))
             fig.add_trace(go.Scatter(x=rsi.index, y=rsi, mode='lines', name=symbol))
-            print(gain)
-            
-            
 
         fig.add_hline(y=70, line_dash="dash", line_color="red")
         fig.add_hline(y=30, line_dash="dash", line_color="red")
         fig.update_layout(title="Relative Strength Index (RSI)", xaxis_title="Date", yaxis_title="RSI")
 
-    elif graph_type == 'macd':
-        fig = go.Figure()
-        for symbol in valid_symbols:
-            series = adj_close[symbol]
-            short_ema = series.ewm(span=12, adjust=False).mean()
-            long_ema = series.ewm(span=26, adjust=False).mean()
-            macd = short_ema - long_ema
-            signal = macd.ewm(span=9, adjust=False).mean()
-            fig.add_trace(go.Scatter(x=macd.index, y=macd, mode='lines', name=f'{symbol} MACD'))
-            fig.add_trace(go.Scatter(x=signal.index, y=signal, mode='lines', name=f'{symbol} Signal'))
+    # Return the Plotly figure as a JSON-ready dict
+    return json.loads(fig.to_json())
 
-        fig.update_layout(title="MACD (Moving Average Convergence Divergence)", xaxis_title="Date", yaxis_title="Value")
 
-    else:
-        return jsonify({"error": "Invalid graph type"}), 400
+# Field each candlestick/volume value comes from, unadjusted and split/dividend-adjusted (adjusted.py)
+ohlc_fields = {
+    False: {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'},
+    True: {'open': 'Adj_Open', 'high': 'Adj_High', 'low': 'Adj_Low', 'close': 'Adj_Close', 'volume': 'Adj_Volume'},
+}
+
+
+def ohlc_frame(symbol, names, adjusted):
+    fields = [ohlc_fields[adjusted][name] for name in names]
+    if any(field not in panel.fields for field in fields):
+        raise ValueError("Adjusted prices are not in the store yet; re-run ingest.py.")
+    frame = panel.symbol_frame(symbol, fields)
+    frame.columns = names
+    return frame
+
+
+def build_candlestick(symbol, adjusted=False):
+    """
+    Same shape as candelstick.py's /api/stocks/<ticker>/candlestick, served from memory.
+    adjusted=True reads the adjusted OHLC columns written at ingest, at no extra cost per request.
+    """
+    ohlc_data = ohlc_frame(symbol, ['open', 'high', 'low', 'close'], adjusted)
+    return {
+        'data': [
+            {
+                'x': ohlc_data.index.strftime('%Y-%m-%dT%H:%M:%S').tolist(),
+                'open': ohlc_data['open'].tolist(),
+                'high': ohlc_data['high'].tolist(),
+                'low': ohlc_data['low'].tolist(),
+                'close': ohlc_data['close'].tolist(),
+                'type': 'candlestick',
+                'name': symbol
+            }
+        ],
+        'layout': {
+            'title': f'{symbol} Candlestick Chart',
+            'xaxis': {'title': 'Date'},
+            'yaxis': {'title': 'Price'},
+            'showlegend': False
+        }
+    }
+
+
+def build_volume(symbol, adjusted=False):
+    """
+    Same shape as trading.py's /api/stocks/<ticker>/volume, served from memory.
+    """
+    stock_data = ohlc_frame(symbol, ['volume'], adjusted)
+    return {
+        "x": stock_data.index.strftime('%Y-%m-%d').tolist(),
+        "y": stock_data['volume'].tolist(),
+    }
+
+
+def check_single_symbol_view(view, symbols, timeframe):
+    """
+    Candlestick and volume draw one symbol's daily rows; reject anything else for them.
+    """
+    if view in single_symbol_views:
+        if len(symbols) > 1:
+            raise ValueError(f"{view} can only be generated for a single symbol.")
+        if timeframe != 'D':
+            raise ValueError(f"{view} is only available for the daily timeframe.")
+
+
+def view_spec(spec):
+    """
+    Validate one {symbols, view, params, timeframe, adjusted} spec and normalize it. The returned
+    key identifies the spec's payload for the response cache and single-flight.
+    """
+    view = spec.get('view') or spec.get('graph_type') or 'daily_returns'
+    symbols = parse_symbols(spec.get('symbols', spec.get('symbol', '')))
+    params = spec.get('params')
+    timeframe = spec.get('timeframe', 'D')
+
+    if not isinstance(view, str) or view not in default_params:
+        raise ValueError("Invalid graph type")
+    if not isinstance(timeframe, str) or timeframe not in timeframes:
+        raise ValueError(f"Invalid timeframe (use one of {', '.join(timeframes)})")
+    if params is not None and not isinstance(params, dict):
+        raise ValueError("'params' must be an object")
+    params = graph_params(view, params or {})
+
+    valid_symbols = [symbol for symbol in symbols if symbol in panel.symbol_index]
+    if not valid_symbols:
+        raise ValueError("No valid stock symbols provided.")
+
+    adjusted = bool(spec.get('adjusted'))
+    check_single_symbol_view(view, valid_symbols, timeframe)
+    key = ('view', view, tuple(valid_symbols), tuple(sorted(params.items())), timeframe, adjusted, cache_version())
+    return key, view, valid_symbols, params, timeframe, adjusted
+
+
+def build_view(spec, shared):
+    """
+    Build one spec's payload as JSON bytes.
+
+    Like the cached GET views, identical specs are built once per data version: later ones are
+    served from response_cache, concurrent ones wait for the build in progress (single-flight),
+    and other workers fetch it from the shared tier.
+    """
+    key, view, symbols, params, timeframe, adjusted = view_spec(spec)
+    entry = response_cache.get(key)
+    if entry is None:
+        def compute():
+            if view == 'candlestick':
+                return dumps(build_candlestick(symbols[0], adjusted))
+            if view == 'volume':
+                return dumps(build_volume(symbols[0], adjusted))
+            return dumps(build_graph(symbols, view, params, shared, timeframe))
+
+        entry = in_flight.do(key, lambda: build_view_entry(key, compute))
+    return entry.body(None)[1]
+
+
+def build_view_entry(key, compute):
+    # As in build_entry: the build this request just missed may have finished in the meantime
+    entry = response_cache.get(key)
+    if entry is not None:
+        return entry
+    entry = CachedBody(get_or_compute(shared_cache, f"response:{key!r}", compute), 'application/json')
+    response_cache.put(key, entry)
+    return entry
+
+
+def graph_request():
+    """
+    The validated (symbols, graph_type, timeframe, params) of a /stock/graph request; a ValueError
+    explains why a request is rejected.
+    """
+    symbols = request.args.get('symbols', '').split(',')
+    graph_type = request.args.get('graph_type', 'daily_returns')
+
+    if not symbols or not graph_type:
+        raise ValueError("Please provide 'symbols' and 'graph_type' parameters.")
+
+    # Validate symbols
+    valid_symbols = [symbol for symbol in symbols if symbol in panel.symbol_index]
+    if not valid_symbols:
+        raise ValueError("No valid stock symbols provided.")
+
+    if graph_type not in graph_types + single_symbol_views:
+        raise ValueError("Invalid graph type")
+
+    # D (daily, the default), W (weekly) or M (monthly) bars
+    timeframe = request.args.get('timeframe', 'D')
+    if timeframe not in timeframes:
+        raise ValueError(f"Invalid timeframe (use one of {', '.join(timeframes)})")
+
+    # Other query parameters (cache busters and the like) are ignored, as they always were
+    given = {key: value for key, value in request.args.items() if key in default_params[graph_type]}
+    params = graph_params(graph_type, given)
+    check_single_symbol_view(graph_type, valid_symbols, timeframe)
+    return valid_symbols, graph_type, timeframe, params
+
+
+def graph_key():
+    try:
+        symbols, graph_type, timeframe, params = graph_request()
+    except ValueError:
+        return None
+    return tuple(symbols), graph_type, timeframe, tuple(sorted(params.items()))
+
+
+@app.route('/stock/graph', methods=['GET'])
+@cached(graph_key)
+def stock_graph():
+    try:
+        symbols, graph_type, timeframe, params = graph_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if graph_type == 'candlestick':
+        return Response(dumps(build_candlestick(symbols[0])), mimetype='application/json')
+    if graph_type == 'volume':
+        return Response(dumps(build_volume(symbols[0])), mimetype='application/json')
+    return Response(dumps(build_graph(symbols, graph_type, params, Intermediates(), timeframe)), mimetype='application/json')
+
+
+@app.route('/stock/batch', methods=['POST'])
+def stock_batch():
+    """
+    Build many charts in one round trip.
+
+    Body: {"requests": [{"symbols": "AAPL,MSFT", "view": "macd", "params": {...}, "timeframe": "W"}, ...], "stream": false}
+    Views are the graph types plus 'candlestick' and 'volume'; timeframe is D (default), W or M,
+    and "adjusted": true gives candlestick/volume split- and dividend-adjusted values.
+    With "stream": true the response is NDJSON, one {"index", "result"} or {"index", "error"}
+    line per spec as soon as it is built.
+    """
+    try:
+        body = json_body()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    specs = body.get('requests')
+    if not isinstance(specs, list) or not specs:
+        return jsonify({"error": "Please provide a non-empty 'requests' list."}), 400
+
+    shared = Intermediates()
+
+    def build(index, spec):
+        # Results arrive already encoded (and possibly cached), so they are spliced in as bytes
+        try:
+            if not isinstance(spec, dict):
+                raise ValueError("Each request must be an object")
+            return b'{"index":%d,"result":%s}' % (index, build_view(spec, shared))
+        except ValueError as e:
+            return dumps({"index": index, "error": str(e)})
+
+    if body.get('stream'):
+        def generate():
+            for index, spec in enumerate(specs):
+                yield build(index, spec) + b'\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    return Response(b'{"results":[' + b','.join(build(index, spec) for index, spec in enumerate(specs)) + b']}', mimetype='application/json')
+
+
+@app.route('/stock/portfolio', methods=['POST'])
+def stock_portfolio():
+    """
+    Equity curve, drawdown and turnover for many candidate portfolios over the same symbols at once.
+
+    Body: {"symbols": ["AAPL", "MSFT"], "weights": [[0.5, 0.5], [0.8, 0.2], ...], "rebalance": "M",
+           "start": "2021-01-01", "end": null, "series": true}
+    rebalance is none, D, W, M (default) or Q. Each weights row is normalized to sum to 1. The
+    equity and drawdown curves come back as one row per portfolio; "series": false returns only
+    the summary figures, which is what ranking hundreds of allocations needs.
+    """
+    try:
+        body = json_body()
+        symbols = parse_symbols(body.get('symbols', ''))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not symbols:
+        return jsonify({"error": "Please provide 'symbols'."}), 400
+    unknown = [symbol for symbol in symbols if symbol not in panel.symbol_index]
+    if unknown:
+        return jsonify({"error": f"Unknown symbols: {', '.join(unknown)}"}), 400
+    if len(set(symbols)) != len(symbols):
+        return jsonify({"error": "Symbols must not repeat."}), 400
+
+    try:
+        frame = date_range(panel.frame('Adj_Close', symbols), body.get('start'), body.get('end'))
+        result = evaluate(frame, body.get('weights'), body.get('rebalance', 'M'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not body.get('series', True):
+        del result['dates'], result['equity'], result['drawdown']
+    result['symbols'] = symbols
+    result['rebalance'] = body.get('rebalance', 'M')
+    return Response(dumps(result), mimetype='application/json')
+
+
+def screen_key():
+    # The filter is echoed back as given, so it is part of the key verbatim
+    return (request.args.get('filter', ''),)
+
+
+@app.route('/stock/screen', methods=['GET'])
+@cached(screen_key)
+def stock_screen():
+    """
+    Return the symbols whose latest values match a filter, e.g. ?filter=rsi<30 and price<bollinger_lower
+    """
+    expression = request.args.get('filter', '')
+    if not expression.strip():
+        return jsonify({"error": "Please provide a 'filter' parameter."}), 400
+
+    try:
+        rows = screen(*screen_tables(), expression)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    # Return the Plotly figure as JSON
-    return jsonify(json.loads(fig.to_json()))
+    return jsonify({"filter": expression, "count": len(rows), "results": rows})
 
 
 if __name__ == '__main__':
@@ -1,18 +1,95 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 import pandas as pd
+import json
 import os
 from flask_cors import CORS
 
+from adjusted import add_adjusted_columns
+from compression import compress_response
+from store import read_column, store_directory, symbol_path
+from streaming import stream_json, stream_modes, stream_ndjson
+
 app = Flask(__name__)
 
 CORS(app)
 
+# Negotiated gzip/brotli on the (non-streamed) chart JSON
+app.after_request(compress_response)
+
 # Define the directory where CS
 directory=r"C:\Users\91790\Desktop\Interactive\backend\Financial Data"
 
+ohlc_columns = ['Open', 'High', 'Low', 'Close']
+
+# Split/dividend-adjusted OHLC written at ingest (adjusted.py); the adjusted close is Adj_Close
+adjusted_ohlc_columns = ['Adj_Open', 'Adj_High', 'Adj_Low', 'Adj_Close']
+
+
+def load_ohlc_arrays(ticker, adjusted=False):
+    """
+    Date and OHLC arrays for streaming: memory-mapped from the columnar store when the symbol has
+    been ingested, otherwise parsed from the CSV. Returns None if neither exists.
+    """
+    symbol = ticker.upper()
+    sources = adjusted_ohlc_columns if adjusted else ohlc_columns
+    if os.path.exists(os.path.join(symbol_path(symbol, store_directory), f'{sources[0]}.npy')):
+        columns = {'x': read_column(symbol, 'Date', store_directory, mmap=True)}
+        for name, col in zip(ohlc_columns, sources):
+            columns[name.lower()] = read_column(symbol, col, store_directory, mmap=True)
+        return columns
+
+    filepath = os.path.join(directory, f"{symbol}.csv")
+    if not os.path.exists(filepath):
+        return None
+    stock_data = pd.read_csv(filepath, skiprows=2, names=['Date', 'Adj_Close', 'Close', 'High', 'Low', 'Open', 'Volume'])
+    stock_data = stock_data[~stock_data['Date'].str.contains('Date', na=False)]
+    if adjusted:
+        add_adjusted_columns(stock_data)
+    columns = {'x': pd.to_datetime(stock_data['Date'].str.slice(0, 19), format='%Y-%m-%d %H:%M:%S').to_numpy()}
+    for name, col in zip(ohlc_columns, sources):
+        columns[name.lower()] = pd.to_numeric(stock_data[col], errors='coerce').to_numpy()
+    return columns
+
+
+def stream_candlestick(ticker, mode, adjusted=False):
+    """
+    Stream the candlestick payload chunk by chunk: mode 'ndjson' writes one row per line, anything
+    else writes the same {"data": [...], "layout": ...} document as the regular response.
+    """
+    columns = load_ohlc_arrays(ticker, adjusted)
+    if columns is None:
+        return jsonify({"error": f"Data for {ticker} not found in {directory}."}), 404
+
+    if mode == 'ndjson':
+        return Response(stream_with_context(stream_ndjson(columns)), mimetype='application/x-ndjson')
+
+    layout = {
+        'title': f'{ticker.upper()} Candlestick Chart',
+        'xaxis': {'title': 'Date'},
+        'yaxis': {'title': 'Price'},
+        'showlegend': False
+    }
+    parts = ['{"data": [{']
+    for name, values in columns.items():
+        parts += [f'"{name}": ', values, ', ']
+    parts.append(f'"type": "candlestick", "name": {json.dumps(ticker.upper())}}}], "layout": {json.dumps(layout)}}}')
+    return Response(stream_with_context(stream_json(parts)), mimetype='application/json')
+
+
 @app.route('/api/stocks/<ticker>/candlestick', methods=['GET'])
 def candlestick_chart(ticker):
+    # CSVs and store directories are named by the upper-case symbol, streamed or not
+    ticker = ticker.upper()
+    # ?stream=1 streams the JSON document, ?stream=ndjson streams one row per line
+    stream = request.args.get('stream')
+    if stream is not None and stream not in stream_modes:
+        return jsonify({"error": f"stream must be one of {', '.join(stream_modes)}."}), 400
+    # ?adjusted=1 plots split/dividend-adjusted OHLC, matching the Adj_Close-based indicators
+    adjusted = request.args.get('adjusted') == '1'
     try:
+        if stream:
+            return stream_candlestick(ticker, stream, adjusted)
+
         # Define the file path for the stock symbol CSV file
         filepath = os.path.join(directory, f"{ticker}.csv")
         
@@ -31,6 +108,9 @@ def candlestick_chart(ticker):
             
             # Extract OHLC data for the candlestick chart
             ohlc_data = stock_data[['Open', 'High', 'Low', 'Close', 'Volume']]
+            if adjusted:
+                add_adjusted_columns(stock_data)
+                ohlc_data = stock_data[adjusted_ohlc_columns + ['Adj_Volume']].set_axis(['Open', 'High', 'Low', 'Close', 'Volume'], axis=1)
             
             # Prepare data for Plotly candlestick chart
             plot_data = {
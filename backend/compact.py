@@ -0,0 +1,85 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from indicators import indicator_set
+from store import list_symbols, read_symbol, store_directory
+
+# Compact in-memory layout: float32 prices and integer volume roughly halve the size of each frame.
+compact_price_columns = ['Adj_Close', 'Close', 'High', 'Low', 'Open', 'Adj_Open', 'Adj_High', 'Adj_Low']
+
+# Largest error allowed between float32 and float64 indicators, relative to the indicator's scale
+precision_tolerance = 1e-4
+
+
+def compact_volume(volume):
+    """
+    Pick the narrowest integer dtype that holds the volume column exactly; keep floats if it has gaps.
+    """
+    volume = pd.to_numeric(volume, errors='coerce')
+    values = volume.to_numpy(dtype=np.float64)
+    if np.isnan(values).any():
+        return volume
+    if values.min() >= 0 and values.max() <= np.iinfo(np.uint32).max:
+        return volume.astype(np.uint32)
+    return volume.astype(np.int64)
+
+
+def compact_frame(stock_data):
+    compact = stock_data.copy()
+    for col in compact_price_columns:
+        if col in compact.columns:
+            compact[col] = pd.to_numeric(compact[col], errors='coerce').astype(np.float32)
+    # Adj_Volume is the (already split-adjusted) share count too, see adjusted.py
+    for col in ('Volume', 'Adj_Volume'):
+        if col in compact.columns:
+            compact[col] = compact_volume(compact[col])
+    return compact
+
+
+def precision_report(series):
+    """
+    Compare every indicator computed from float32 prices against the float64 result.
+    """
+    full = indicator_set(series.astype(np.float64))
+    reduced = indicator_set(series.astype(np.float32))
+    report = {}
+    for name, expected in full.items():
+        expected = expected.to_numpy(dtype=np.float64)
+        actual = reduced[name].to_numpy(dtype=np.float64)
+        scale = np.nanmax(np.abs(expected)) if np.isfinite(expected).any() else 0.0
+        error = np.nanmax(np.abs(actual - expected)) if np.isfinite(expected).any() else 0.0
+        report[name] = error / scale if scale else error
+    return report
+
+
+def validate_compact(symbols=None, directory=store_directory, tolerance=precision_tolerance):
+    """
+    Run precision_report over the store and return {symbol: {indicator: relative_error}} for failures.
+    """
+    failures = {}
+    for symbol in symbols or list_symbols(directory):
+        adj_close = read_symbol(symbol, directory, columns=['Adj_Close'])['Adj_Close']
+        report = precision_report(adj_close)
+        bad = {name: error for name, error in report.items() if not error <= tolerance}
+        if bad:
+            failures[symbol] = bad
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check float32 indicators against float64 for the stored symbols.")
+    parser.add_argument('symbols', nargs='*')
+    parser.add_argument('--store', default=store_directory)
+    parser.add_argument('--tolerance', type=float, default=precision_tolerance)
+    args = parser.parse_args()
+
+    failures = validate_compact(args.symbols, args.store, args.tolerance)
+    for symbol, bad in failures.items():
+        for name, error in sorted(bad.items(), key=lambda item: -item[1]):
+            print(f"{symbol}: {name} relative error {error:.2e} [FAIL]")
+    checked = len(args.symbols or list_symbols(args.store))
+    print(f"{checked - len(failures)} of {checked} symbols within {args.tolerance:.0e}")
+    sys.exit(1 if failures else 0)
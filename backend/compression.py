@@ -0,0 +1,126 @@
+import gzip
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are sent as-is; compressing them costs more than it saves
+min_compress_size = 1024
+
+
+def negotiate(accept_encoding):
+    """
+    Pick 'br' or 'gzip' from an Accept-Encoding header (honouring q=0), or None for identity.
+    """
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    for encoding in ('br', 'gzip'):
+        if encoding == 'br' and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding, best=False):
+    """
+    Compress a body. best=True spends more CPU for a smaller result, for bodies compressed only once.
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=9 if best else 5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=9 if best else 6)
+    return body
+
+
+class CachedBody:
+    """
+    A response body kept with its compressed variants, each produced the first time it is asked for.
+    """
+
+    def __init__(self, body, mimetype):
+        self.mimetype = mimetype
+        self.variants = {None: body}
+        self.lock = threading.Lock()
+        # Bytes held across every variant, which ResponseCache counts against its limit
+        self.size = len(body)
+
+    def body(self, encoding):
+        if encoding is None or len(self.variants[None]) < min_compress_size:
+            return None, self.variants[None]
+        variant = self.variants.get(encoding)
+        if variant is None:
+            with self.lock:
+                variant = self.variants.get(encoding)
+                if variant is None:
+                    variant = compress(self.variants[None], encoding, best=True)
+                    self.variants[encoding] = variant
+                    self.size += len(variant)
+        return encoding, variant
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU of CachedBody entries, bounded by entry count and, if max_bytes is set, by the
+    bytes of every entry's body and compressed variants together (the newest entry is always kept).
+    """
+
+    def __init__(self, max_entries=256, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            if self.max_bytes is not None:
+                # Variants are compressed after an entry is stored, so sizes are summed afresh here
+                total = sum(cached.size for cached in self.entries.values())
+                while total > self.max_bytes and len(self.entries) > 1:
+                    _, evicted = self.entries.popitem(last=False)
+                    total -= evicted.size
+
+
+def compress_response(response):
+    """
+    after_request hook: compress uncached bodies when the client accepts it.
+    """
+    response.headers.add('Vary', 'Accept-Encoding')
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 304) or 'Content-Encoding' in response.headers):
+        return response
+
+    encoding = negotiate(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < min_compress_size:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,101 @@
+import json
+import os
+
+import numpy as np
+
+from streaming import chunk_values
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library encoder
+    orjson = None
+
+# Plotly's default qualitative colour sequence, so direct traces look like the px.line output
+plotly_colors = ['#636efa', '#EF553B', '#00cc96', '#ab63fa', '#FFA15A', '#19d3f3', '#FF6692', '#B6E880', '#FF97FF', '#FECB52']
+
+# The default 'plotly' template every Plotly figure embeds in its layout, saved once from
+# plotly.io.templates so figures built here render the same without importing Plotly
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plotly_template.json')) as f:
+    plotly_template = json.load(f)
+
+# px.line draws with WebGL (scattergl) once its long-form data has more points than this
+webgl_threshold = 1000
+
+
+def default(value):
+    """
+    Encode what neither encoder handles natively: non-contiguous arrays, numpy scalars, Timestamps.
+    """
+    if isinstance(value, np.ndarray):
+        if orjson is not None and value.dtype.kind in 'fiub':
+            return np.ascontiguousarray(value)
+        return chunk_values(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """
+    Serialize obj to JSON bytes, writing NumPy arrays directly (NaN as null, datetime64 as ISO strings).
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=default).encode()
+
+
+def line_trace(x, y, name, **extra):
+    """
+    A Plotly scatter trace built straight from arrays, like go.Scatter(mode='lines'), without
+    constructing a figure object.
+    """
+    trace = {
+        'type': 'scatter',
+        'mode': 'lines',
+        'name': name,
+        'x': np.ascontiguousarray(x),
+        'y': np.ascontiguousarray(y),
+    }
+    trace.update(extra)
+    return trace
+
+
+def px_line_traces(x, columns, value_label):
+    """
+    The traces px.line draws for a wide frame ({column name: values} sharing the x values),
+    including its switch to scattergl for large data.
+    """
+    webgl = len(x) * len(columns) > webgl_threshold
+    traces = []
+    for i, (name, y) in enumerate(columns.items()):
+        trace = line_trace(
+            x, y, name,
+            legendgroup=name,
+            hovertemplate=f'variable={name}<br>Date=%{{x}}<br>{value_label}=%{{y}}<extra></extra>',
+            line={'color': plotly_colors[i % len(plotly_colors)], 'dash': 'solid'},
+            marker={'symbol': 'circle'},
+            showlegend=True,
+            xaxis='x',
+            yaxis='y',
+        )
+        if webgl:
+            trace['type'] = 'scattergl'
+        else:
+            trace['orientation'] = 'v'
+        traces.append(trace)
+    return traces
+
+
+def figure(traces, title, xaxis_title, yaxis_title, **layout):
+    """
+    A figure dict shaped like Plotly's to_json() output; axis entries in layout are merged with the titles.
+    """
+    layout.update({
+        'template': plotly_template,
+        'title': {'text': title},
+        'xaxis': dict(layout.get('xaxis', {}), title={'text': xaxis_title}),
+        'yaxis': dict(layout.get('yaxis', {}), title={'text': yaxis_title}),
+    })
+    return {'data': traces, 'layout': layout}
@@ -0,0 +1,54 @@
+# Indicator maths shared by the Flask apps; every function takes a price Series (or DataFrame
+# of symbols) and returns pandas objects aligned to the same index.
+
+
+def calculate_daily_returns(adj_close):
+    return adj_close.pct_change().dropna()
+
+
+def calculate_rolling_mean(adj_close, window=20):
+    return adj_close.rolling(window=window).mean()
+
+
+def calculate_rsi(series, window=14):
+    delta = series.diff(1)
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(window=window).mean()
+    avg_loss = loss.rolling(window=window).mean()
+    rs = avg_gain / avg_loss
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+def calculate_bollinger_bands(series, window=20):
+    sma = series.rolling(window=window).mean()
+    std = series.rolling(window=window).std()
+    upper_band = sma + (2 * std)
+    lower_band = sma - (2 * std)
+    return sma, upper_band, lower_band
+
+
+def calculate_macd(series, short_window=12, long_window=26, signal_window=9):
+    short_ema = series.ewm(span=short_window, adjust=False).mean()
+    long_ema = series.ewm(span=long_window, adjust=False).mean()
+    macd = short_ema - long_ema
+    signal = macd.ewm(span=signal_window, adjust=False).mean()
+    return macd, signal
+
+
+def indicator_set(series):
+    """
+    Every indicator the graph endpoint can draw for one price series, keyed by a flat name.
+    """
+    sma, upper_band, lower_band = calculate_bollinger_bands(series)
+    macd, signal = calculate_macd(series)
+    return {
+        'daily_returns': calculate_daily_returns(series),
+        'rolling_mean': calculate_rolling_mean(series),
+        'bollinger_upper': upper_band,
+        'bollinger_lower': lower_band,
+        'rsi': calculate_rsi(series),
+        'macd': macd,
+        'macd_signal': signal,
+    }
@@ -0,0 +1,126 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from adjusted import add_adjusted_columns, adjusted_columns
+from compact import compact_frame
+from materialize import materialize_store
+from panel import Panel
+from store import list_symbols, price_columns, read_symbol, snapshot_path, store_directory, write_manifest, write_symbol
+
+# Define the directory where CSV files are stored
+directory = "Financial Data"
+
+csv_dtypes = {col: 'float64' for col in price_columns}
+
+
+def count_header_rows(filepath):
+    """
+    The downloaded CSVs start with a few label rows (Price/Ticker/Date); data rows start with a digit.
+    """
+    count = 0
+    with open(filepath) as f:
+        for line in f:
+            if line[:1].isdigit():
+                break
+            count += 1
+    return count
+
+
+def parse_csv(filepath):
+    """
+    Parse one price CSV into a Date-indexed frame with float64 columns.
+
+    Skipping the label rows up front replaces the str.contains('Date') filter, and the explicit
+    dtypes keep every column numeric instead of object.
+    """
+    stock_data = pd.read_csv(
+        filepath,
+        skiprows=count_header_rows(filepath),
+        header=None,
+        names=['Date'] + price_columns,
+        dtype=csv_dtypes,
+        engine='c',
+    )
+    # Dates look like '2020-01-02 00:00:00+00:00' (sometimes with fractional seconds); the first
+    # 19 characters are fixed width, so slice them and parse with an exact format.
+    stock_data['Date'] = pd.to_datetime(stock_data['Date'].str.slice(0, 19), format='%Y-%m-%d %H:%M:%S')
+    stock_data.set_index('Date', inplace=True)
+    return stock_data
+
+
+def ingest_file(job):
+    """
+    Worker entry point: parse one CSV, add the adjusted OHLC/volume columns and write it straight
+    to the store, returning only a summary.
+    """
+    filepath, store = job
+    symbol = os.path.splitext(os.path.basename(filepath))[0]
+    try:
+        stock_data = add_adjusted_columns(parse_csv(filepath))
+        write_symbol(symbol, stock_data, store)
+        return symbol, len(stock_data), None
+    except Exception as e:
+        return symbol, 0, str(e)
+
+
+def ingest_directory(source=directory, store=store_directory, symbols=None, workers=None):
+    """
+    Convert every CSV in source (or just the given symbols) into the columnar store in parallel.
+    """
+    if symbols:
+        files = [os.path.join(source, f"{symbol}.csv") for symbol in symbols]
+    else:
+        files = sorted(os.path.join(source, name) for name in os.listdir(source) if name.endswith('.csv'))
+    os.makedirs(store, exist_ok=True)
+
+    loaded = {}
+    failed = {}
+    jobs = [(filepath, store) for filepath in files]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Larger chunks keep the per-task overhead low when converting thousands of small files
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+        for symbol, rows, error in executor.map(ingest_file, jobs, chunksize=chunksize):
+            if error is None:
+                loaded[symbol] = rows
+            else:
+                failed[symbol] = error
+
+    if loaded:
+        manifest = write_manifest(loaded, store)
+        write_snapshot(store, manifest['version'])
+        # Indicator tables for every stored symbol, so default-parameter charts are plain reads
+        for symbol, error in materialize_store(store, workers=workers).items():
+            failed[symbol] = f"materialize: {error}"
+    return loaded, failed
+
+
+def write_snapshot(store=store_directory, version=None):
+    """
+    Align every stored symbol into one panel and save it, so app.py can start by memory-mapping it;
+    the compact snapshot is the same panel in the COMPACT_PRICES layout.
+    """
+    data = {symbol: read_symbol(symbol, store) for symbol in list_symbols(store)}
+    Panel(data, fields=price_columns + adjusted_columns).save(snapshot_path(store), version)
+    compact = {symbol: compact_frame(frame) for symbol, frame in data.items()}
+    Panel(compact, fields=price_columns + adjusted_columns).save(snapshot_path(store, compact=True), version)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bulk-convert price CSVs into the columnar store.")
+    parser.add_argument('symbols', nargs='*', help="Symbols to ingest (default: every CSV in --source)")
+    parser.add_argument('--source', default=directory, help="Directory holding the <SYMBOL>.csv files")
+    parser.add_argument('--store', default=store_directory, help="Columnar store directory to write")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    loaded, failed = ingest_directory(args.source, args.store, args.symbols, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for symbol, error in sorted(failed.items()):
+        print(f"Failed to load {symbol}: {error}")
+    print(f"Ingested {len(loaded)} symbols ({sum(loaded.values())} rows) into {args.store} in {elapsed:.2f}s")
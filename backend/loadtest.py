@@ -0,0 +1,266 @@
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from store import list_symbols, store_directory
+
+# Replays dashboard-like traffic against the backends and reports throughput, latency percentiles
+# and error rates per endpoint. Only the standard library is used for the client side, so the
+# numbers reflect the servers rather than an HTTP library's connection pooling.
+
+backend_directory = os.path.dirname(os.path.abspath(__file__))
+
+# Flask module and port for each backend, as they run in development
+servers = {
+    'app': 5000,
+    'candelstick': 5002,
+    'trading': 5003,
+}
+
+default_symbols = ["AAPL", "MSFT", "GOOG", "AMZN", "TSLA", "SPY", "NVDA", "META", "NFLX", "AMD"]
+
+# Share of requests per endpoint. App.js fetches every chart with GET /stock/graph, so that is the
+# whole default mix; batch and the per-ticker candlestick and volume APIs can be weighted in with --mix.
+default_mix = {'graph': 1.0, 'batch': 0.0, 'candlestick': 0.0, 'volume': 0.0}
+
+# Views picked by graph and batch requests, as offered in App.js' chart selector (trading_volume is 'volume')
+default_views = {'daily_returns': 0.2, 'rolling_mean': 0.15, 'bollinger_bands': 0.15, 'rsi': 0.1, 'macd': 0.1,
+                 'candlestick': 0.15, 'volume': 0.15}
+
+# Views that draw one symbol only
+single_symbol_views = ('candlestick', 'volume')
+
+
+def parse_weights(text, defaults):
+    """
+    'graph=0.6,volume=0.4' -> {'graph': 0.6, 'volume': 0.4}; names must come from defaults.
+    """
+    if not text:
+        return dict(defaults)
+    weights = {}
+    for item in text.split(','):
+        name, _, value = item.partition('=')
+        if name not in defaults:
+            raise ValueError(f"Unknown name '{name}' (use {', '.join(defaults)})")
+        weights[name] = float(value or 1)
+    return weights
+
+
+def zipf_weights(count, exponent):
+    """
+    Popularity of the symbol at each rank: a few tickers get most of the traffic.
+    """
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, name, status, seconds, size):
+        with self.lock:
+            self.samples.setdefault(name, []).append((status, seconds, size))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float('nan')
+    # Nearest-rank percentile
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+class TrafficModel:
+    """
+    Builds the next request for a simulated user: endpoint, symbols and graph type.
+    """
+
+    def __init__(self, args, symbols):
+        self.args = args
+        self.symbols = symbols
+        self.symbol_weights = zipf_weights(len(symbols), args.zipf)
+        self.mix = parse_weights(args.mix, default_mix)
+        self.views = parse_weights(args.views, default_views)
+
+    def pick(self, rng, weights):
+        return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def pick_symbols(self, rng, count):
+        chosen = []
+        while len(chosen) < min(count, len(self.symbols)):
+            symbol = rng.choices(self.symbols, weights=self.symbol_weights)[0]
+            if symbol not in chosen:
+                chosen.append(symbol)
+        return chosen
+
+    def next_request(self, rng):
+        """
+        Returns (name, url, body) where body is None for GET requests.
+        """
+        endpoint = self.pick(rng, self.mix)
+        if endpoint in ('candlestick', 'volume'):
+            symbol = self.pick_symbols(rng, 1)[0]
+            port = servers['candelstick'] if endpoint == 'candlestick' else servers['trading']
+            query = f"?{self.args.ticker_query}" if self.args.ticker_query else ''
+            return endpoint, f"{self.args.host}:{port}/api/stocks/{symbol}/{endpoint}{query}", None
+
+        view = self.pick(rng, self.views)
+        count = 1 if view in single_symbol_views else rng.randint(1, self.args.max_symbols)
+        symbols = ','.join(self.pick_symbols(rng, count))
+        if endpoint == 'graph':
+            return f"graph[{view}]", f"{self.args.host}:{servers['app']}/stock/graph?symbols={symbols}&graph_type={view}", None
+        body = {"requests": [{"symbols": symbols, "view": view}]}
+        return f"batch[{view}]", f"{self.args.host}:{servers['app']}/stock/batch", json.dumps(body).encode()
+
+
+def run_user(user, model, recorder, deadline, args):
+    rng = random.Random(args.seed * 1000 + user)
+    headers = {'X-Client-Id': f'loadtest-{user}', 'Accept-Encoding': args.accept_encoding}
+    while time.monotonic() < deadline:
+        name, url, body = model.next_request(rng)
+        request = urllib.request.Request(url, data=body, headers=dict(headers, **({'Content-Type': 'application/json'} if body else {})))
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=args.timeout) as response:
+                size = len(response.read())
+                status = response.status
+        except urllib.error.HTTPError as e:
+            size = len(e.read())
+            status = e.code
+        except Exception:
+            size = 0
+            status = 'error'
+        recorder.add(name, status, time.perf_counter() - start, size)
+        if args.think_time:
+            time.sleep(rng.expovariate(1 / args.think_time))
+
+
+def report(recorder, elapsed):
+    """
+    One row per endpoint plus a total: throughput, latency percentiles (ms) and error rate.
+    """
+    rows = []
+    everything = []
+    for name in sorted(recorder.samples):
+        samples = recorder.samples[name]
+        everything.extend(samples)
+        rows.append(summarize(name, samples, elapsed))
+    rows.append(summarize('total', everything, elapsed))
+    return rows
+
+
+def summarize(name, samples, elapsed):
+    latencies = sorted(seconds * 1000 for _, seconds, _ in samples)
+    statuses = {}
+    for status, _, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 400)
+    return {
+        'endpoint': name,
+        'requests': len(samples),
+        'throughput': len(samples) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': latencies[-1] if latencies else float('nan'),
+        'error_rate': errors / len(samples) if samples else 0.0,
+        'statuses': statuses,
+        'mean_bytes': sum(size for _, _, size in samples) / len(samples) if samples else 0.0,
+    }
+
+
+def print_report(rows):
+    print(f"{'endpoint':<26}{'reqs':>8}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>9}  statuses")
+    for row in rows:
+        statuses = ' '.join(f"{status}:{count}" for status, count in sorted(row['statuses'].items()))
+        print(f"{row['endpoint']:<26}{row['requests']:>8}{row['throughput']:>9.1f}{row['p50_ms']:>10.1f}"
+              f"{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}{row['error_rate']:>8.1%}  {statuses}")
+
+
+def start_servers(names, env):
+    """
+    Start each backend with `flask run` (threaded, no reloader) and wait until it answers.
+    """
+    processes = []
+    for name in names:
+        command = [sys.executable, '-m', 'flask', '--app', name, 'run', '--port', str(servers[name]), '--no-reload', '--no-debugger']
+        processes.append(subprocess.Popen(command, cwd=backend_directory, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    for name in names:
+        wait_until_up(f"http://127.0.0.1:{servers[name]}/readyz" if name == 'app' else f"http://127.0.0.1:{servers[name]}/")
+    return processes
+
+
+def wait_until_up(url, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return
+        except urllib.error.HTTPError as e:
+            # Any answer other than "still loading" means the server is serving
+            if e.code != 503:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay dashboard traffic against the backends and report latency per endpoint.")
+    parser.add_argument('--start', action='store_true', help="Start app.py (and candelstick.py/trading.py if the mix uses them) locally first")
+    parser.add_argument('--host', default='http://127.0.0.1', help="Scheme and host of the running backends")
+    parser.add_argument('--users', type=int, default=20, help="Concurrent simulated users")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds to run")
+    parser.add_argument('--think-time', type=float, default=0.2, help="Mean pause between a user's requests (s)")
+    parser.add_argument('--zipf', type=float, default=1.1, help="Symbol popularity skew (0 = uniform)")
+    parser.add_argument('--max-symbols', type=int, default=3, help="Most symbols selected in one chart")
+    parser.add_argument('--mix', default='', help="Endpoint weights, e.g. graph=0.7,batch=0.1,candlestick=0.1,volume=0.1")
+    parser.add_argument('--views', default='', help="View weights for graph and batch requests, e.g. rsi=1,candlestick=1")
+    # Without stream the ticker apps read CSVs from their hardcoded directory; streamed responses
+    # come from the columnar store
+    parser.add_argument('--ticker-query', default='stream=1', help="Query string for candlestick/volume requests ('' for the CSV path)")
+    parser.add_argument('--accept-encoding', default='gzip', help="Accept-Encoding sent with every request")
+    parser.add_argument('--timeout', type=float, default=30, help="Per-request timeout (s)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="Also write the report rows to this file")
+    args = parser.parse_args()
+
+    symbols = list_symbols(store_directory) or default_symbols
+    model = TrafficModel(args, symbols)
+
+    # Servers started here take each simulated user's X-Client-Id, so users get their own buckets
+    env = dict(os.environ, TRUSTED_CLIENT_ID_PROXIES=os.environ.get('TRUSTED_CLIENT_ID_PROXIES', '127.0.0.1'))
+    needed = ['app'] + [name for name, endpoint in (('candelstick', 'candlestick'), ('trading', 'volume')) if model.mix.get(endpoint)]
+    processes = start_servers(needed, env) if args.start else []
+    try:
+        recorder = Recorder()
+        start = time.monotonic()
+        deadline = start + args.duration
+        users = [threading.Thread(target=run_user, args=(user, model, recorder, deadline, args), daemon=True) for user in range(args.users)]
+        for thread in users:
+            thread.start()
+        for thread in users:
+            thread.join()
+        rows = report(recorder, time.monotonic() - start)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    print_report(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
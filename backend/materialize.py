@@ -0,0 +1,173 @@
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from indicators import calculate_bollinger_bands, calculate_macd, calculate_rsi
+from store import data_version, indicator_directory, list_symbols, mark_materialized, read_column, read_symbol, save_array, screen_directory, stored_columns, store_directory, write_symbol
+
+# Bar size per timeframe: daily prices as stored, week-ending-Friday and month-end closes
+timeframes = {'D': None, 'W': 'W-FRI', 'M': 'ME'}
+
+# Columns written for every symbol and timeframe, all with the graph endpoint's default parameters
+# (rolling_mean is the 20-day SMA, which is also the Bollinger middle band)
+indicator_columns = ['Adj_Close', 'rolling_mean', 'bollinger_upper', 'bollinger_lower', 'rsi', 'macd', 'macd_signal']
+
+# Price fields the screener filters on besides the indicators, under their lower-cased names
+screen_fields = ['Close', 'Open', 'High', 'Low', 'Volume']
+
+# Columns of the screen table: the symbol, then one latest value per screenable field
+screen_columns = ['price', 'daily_return', 'rolling_mean', 'bollinger_upper', 'bollinger_lower', 'rsi', 'macd', 'macd_signal'] + \
+    [field.lower() for field in screen_fields]
+
+
+def resample_prices(series, timeframe):
+    """
+    Closing price per bar for a timeframe; periods without any trading are dropped.
+    """
+    rule = timeframes[timeframe]
+    if rule is None:
+        return series
+    return series.resample(rule).last().dropna()
+
+
+def indicator_frame(series):
+    """
+    The default-parameter indicator set for one price series, as one frame aligned to its dates.
+    """
+    sma, upper_band, lower_band = calculate_bollinger_bands(series)
+    macd, signal = calculate_macd(series)
+    return pd.DataFrame({
+        'Adj_Close': series,
+        'rolling_mean': sma,
+        'bollinger_upper': upper_band,
+        'bollinger_lower': lower_band,
+        'rsi': calculate_rsi(series),
+        'macd': macd,
+        'macd_signal': signal,
+    })
+
+
+def screen_row(prices, indicators):
+    """
+    A symbol's latest screen values from its own daily price rows and the indicator_frame of them.
+    """
+    last = indicators.iloc[-1]
+    row = {
+        'price': last['Adj_Close'],
+        'daily_return': indicators['Adj_Close'].iloc[-2:].pct_change().iloc[-1],
+        'rolling_mean': last['rolling_mean'],
+        'bollinger_upper': last['bollinger_upper'],
+        'bollinger_lower': last['bollinger_lower'],
+        'rsi': last['rsi'],
+        'macd': last['macd'],
+        'macd_signal': last['macd_signal'],
+    }
+    for field in screen_fields:
+        if field in prices:
+            row[field.lower()] = prices[field].iloc[-1]
+    return {name: float(value) for name, value in row.items()}
+
+
+def materialize_symbol(job):
+    """
+    Worker entry point: write every timeframe's indicator table for one stored symbol under the
+    data version, then drop the tables of other versions. Also returns the symbol's last date and
+    screen row.
+    """
+    symbol, store, version = job
+    try:
+        fields = [field for field in screen_fields if field in stored_columns(symbol, store)]
+        prices = read_symbol(symbol, store, columns=['Adj_Close'] + fields)
+        for timeframe in timeframes:
+            indicators = indicator_frame(resample_prices(prices['Adj_Close'], timeframe))
+            write_symbol(timeframe, indicators, indicator_directory(symbol, store, version))
+            if timeframe == 'D':
+                row = (indicators.index[-1], screen_row(prices, indicators))
+        # A worker still on an older version then computes the indicators instead; tables it has
+        # already mapped stay readable (and on Windows the open files are simply left behind)
+        parent = indicator_directory(symbol, store)
+        for name in os.listdir(parent):
+            if name != version:
+                shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+        return symbol, row, None
+    except Exception as e:
+        return symbol, None, str(e)
+
+
+def write_screen_table(rows, version, store=store_directory):
+    """
+    Write the screen table ({symbol: (date, row)}) for a data version and drop older versions.
+    Fields a symbol does not store are NaN.
+    """
+    symbols = sorted(rows)
+    frame = pd.DataFrame({name: np.array([rows[symbol][1].get(name, np.nan) for symbol in symbols], dtype=np.float64) for name in screen_columns},
+                         index=pd.DatetimeIndex([rows[symbol][0] for symbol in symbols], name='Date'))
+    root = screen_directory(store)
+    write_symbol(version, frame, root)
+    # A fixed-width string array, which np.load reads without pickling
+    save_array(os.path.join(screen_directory(store, version), 'symbol.npy'), np.array(symbols, dtype=str))
+    for name in os.listdir(root):
+        if name != version:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def read_screen_table(version, store=store_directory):
+    """
+    (symbols, dates, table) as screener.build_screen_table returns them, from the stored screen table.
+    """
+    frame = read_symbol(version, screen_directory(store), columns=screen_columns)
+    symbols = [str(symbol) for symbol in read_column(version, 'symbol', screen_directory(store))]
+    return symbols, frame.index, {name: frame[name].to_numpy(dtype=np.float64) for name in screen_columns}
+
+
+def materialize_store(store=store_directory, symbols=None, workers=None):
+    """
+    Rebuild the indicator tables for every symbol in the store (or just the given ones) in parallel.
+
+    The manifest is only marked as materialized for the current data version when every symbol
+    in the store was rebuilt without errors, so app.py never reads tables from older data.
+    """
+    version = data_version(store)
+    jobs = [(symbol, store, version) for symbol in (symbols or list_symbols(store))]
+    failed = {}
+    rows = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+        for symbol, row, error in executor.map(materialize_symbol, jobs, chunksize=chunksize):
+            if error is not None:
+                failed[symbol] = error
+            else:
+                rows[symbol] = row
+
+    if not failed and not symbols:
+        write_screen_table(rows, version, store)
+        mark_materialized(version, store)
+    return failed
+
+
+def read_indicators(symbol, timeframe, version, store=store_directory):
+    """
+    Memory-map one symbol's indicator table for a timeframe, as built from the given data version.
+    """
+    return read_symbol(timeframe, indicator_directory(symbol, store, version), columns=indicator_columns, mmap=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Precompute the default indicator set for every symbol and timeframe.")
+    parser.add_argument('symbols', nargs='*', help="Symbols to rebuild (default: every symbol in the store)")
+    parser.add_argument('--store', default=store_directory, help="Columnar store directory")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    failed = materialize_store(args.store, args.symbols, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for symbol, error in sorted(failed.items()):
+        print(f"Failed to materialize {symbol}: {error}")
+    print(f"Materialized indicators into {args.store} in {elapsed:.2f}s")
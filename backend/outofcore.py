@@ -0,0 +1,410 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from indicators import calculate_macd, calculate_rsi
+from panel import Panel
+from rolling import RollingSums, rolling_max, rolling_min
+from store import read_column, snapshot_path, store_directory
+
+# Out-of-core versions of the analytics paths for histories larger than memory. Data is read in
+# row chunks from the memory-mapped store, and every processor carries just enough state across
+# chunk boundaries (previous row, running peak, prefix-sum rows, EWM values, co-moments) that
+# memory stays bounded by the chunk size while the results match the in-memory (pandas) path:
+# returns, drawdown, rolling min/max and MACD bit for bit; rolling mean/std/zscore, RSI and
+# correlation to rounding.
+
+default_chunk_rows = 65536
+
+
+def first_valid(values):
+    """
+    Each column's first non-NaN value, or NaN for columns without one.
+    """
+    valid = ~np.isnan(values)
+    first = values[np.argmax(valid, axis=0), np.arange(values.shape[1])]
+    return np.where(valid.any(axis=0), first, np.nan)
+
+
+def iter_chunks(values, chunk_rows=default_chunk_rows):
+    """
+    Consecutive row blocks of an array (normally a read-only memory map) as 2-D float64 arrays.
+    """
+    for start in range(0, len(values), chunk_rows):
+        block = np.asarray(values[start:start + chunk_rows], dtype=np.float64)
+        yield block[:, None] if block.ndim == 1 else block
+
+
+def symbol_chunks(symbol, column='Adj_Close', chunk_rows=default_chunk_rows, directory=store_directory):
+    """
+    One stored symbol's column, chunk by chunk, from its memory-mapped .npy file.
+    """
+    return iter_chunks(read_column(symbol, column, directory, mmap=True), chunk_rows)
+
+
+def panel_chunks(field='Adj_Close', symbols=None, chunk_rows=default_chunk_rows, directory=store_directory):
+    """
+    (dates x symbols) blocks of one field from the memory-mapped panel snapshot, with the same rows
+    as Panel.frame: dates none of the symbols trade on are dropped, other gaps are NaN.
+    """
+    panel = Panel.load(snapshot_path(directory))
+    columns = panel.columns(symbols or panel.symbols)
+    for start in range(0, len(panel.dates), chunk_rows):
+        # Slice rows before picking columns, so only this block is ever read from disk
+        present = np.asarray(panel.present[start:start + chunk_rows])[:, columns]
+        rows = present.any(axis=1)
+        block = Panel.with_gaps(np.asarray(panel.values[field][start:start + chunk_rows])[:, columns], present)
+        yield block[rows].astype(np.float64)
+
+
+class ChunkedReturns:
+    """
+    Simple returns (pandas pct_change) across chunks; the carried state is the previous row.
+    """
+
+    def __init__(self):
+        self.previous = None
+
+    def update(self, chunk):
+        previous = self.previous if self.previous is not None else np.full((1, chunk.shape[1]), np.nan)
+        self.previous = chunk[-1:]
+        return chunk / np.concatenate([previous, chunk[:-1]]) - 1
+
+
+class ChunkedRolling:
+    """
+    Rolling mean/std/var/zscore/min/max for several windows across chunks.
+
+    Moments come from RollingSums continued across chunks (same anchor, carried prefix rows), so
+    they do not depend on the chunk size and match pandas rolling to rounding; min and max re-scan
+    the last max(windows) - 1 raw rows in front of each chunk and match pandas exactly.
+    """
+
+    def __init__(self, windows, stats=('mean', 'std')):
+        self.windows = sorted(set(windows))
+        self.stats = stats
+        self.anchor = None
+        self.carried = None
+        self.tail = None
+
+    def update(self, chunk):
+        found = first_valid(chunk)
+        # A column's anchor is its first valid value overall; until one appears its sums are all
+        # zero, so resolving it in a later chunk is the same as resolving it up front
+        self.anchor = found if self.anchor is None else np.where(np.isnan(self.anchor), found, self.anchor)
+        sums = RollingSums(chunk, np.nan_to_num(self.anchor), self.carried)
+        self.carried = sums.carry(self.windows[-1])
+
+        extended = chunk if self.tail is None else np.concatenate([self.tail, chunk])
+        self.tail = extended[max(0, len(extended) - (self.windows[-1] - 1)):] if self.windows[-1] > 1 else extended[:0]
+
+        compute = {
+            'mean': sums.mean,
+            'std': sums.std,
+            'var': sums.var,
+            'zscore': sums.zscore,
+            'min': lambda window: rolling_min(extended, window)[len(extended) - len(chunk):],
+            'max': lambda window: rolling_max(extended, window)[len(extended) - len(chunk):],
+        }
+        return {stat: {window: compute[stat](window) for window in self.windows} for stat in self.stats}
+
+
+class ChunkedRSI:
+    """
+    RSI (indicators.calculate_rsi) across chunks: the carried state is the previous row, for the
+    price change, and the last window - 1 gains and losses, for the rolling means.
+
+    The means restart from the carried rows in every chunk, so they are only guaranteed to match
+    pandas' running sums over the whole history to rounding, not bit for bit.
+    """
+
+    def __init__(self, window=14):
+        self.window = window
+        self.previous = None
+        self.tail = None
+
+    def update(self, chunk):
+        previous = self.previous if self.previous is not None else np.full((1, chunk.shape[1]), np.nan)
+        self.previous = chunk[-1:]
+        delta = chunk - np.concatenate([previous, chunk[:-1]])
+        # As delta.where(...) in calculate_rsi: the first row and rows next to a gap count as 0
+        changes = np.concatenate([np.where(delta > 0, delta, 0.0), -np.where(delta < 0, delta, 0.0)], axis=1)
+        extended = changes if self.tail is None else np.concatenate([self.tail, changes])
+        self.tail = extended[max(0, len(extended) - (self.window - 1)):]
+
+        averages = pd.DataFrame(extended).rolling(window=self.window).mean().to_numpy()[len(extended) - len(chunk):]
+        avg_gain, avg_loss = averages[:, :chunk.shape[1]], averages[:, chunk.shape[1]:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+class ChunkedEWM:
+    """
+    pandas ewm(span, adjust=False).mean() across chunks.
+
+    The state per column is the last average and how many NaN rows have followed it: pandas keeps
+    the average through a gap but shrinks its weight by (1 - alpha) per missing row. Replaying that
+    as a short prefix (the average, then the NaN rows) in front of the next chunk puts pandas in
+    exactly the state it had, so the results are bit-identical to one pass over the history.
+    """
+
+    def __init__(self, span):
+        self.span = span
+        # After this many NaN rows the old average's weight has stopped changing (it has underflowed
+        # to zero or the smallest subnormal), so longer gaps replay the same and the prefix stays bounded
+        decay = 1 - 2 / (span + 1)
+        weight, self.max_gap = 1.0, 0
+        while weight * decay != weight:
+            weight *= decay
+            self.max_gap += 1
+        self.last = None
+        self.gap = None
+
+    def update(self, chunk):
+        columns = chunk.shape[1]
+        if self.last is None:
+            prefix = chunk[:0]
+        else:
+            gap = np.minimum(self.gap, self.max_gap)
+            # Leading NaN rows before a column's average are ignored, so columns can share a prefix
+            prefix = np.full((gap.max() + 1, columns), np.nan)
+            prefix[gap.max() - gap, np.arange(columns)] = self.last
+        result = pd.DataFrame(np.concatenate([prefix, chunk])).ewm(span=self.span, adjust=False).mean().to_numpy()[len(prefix):]
+
+        # The average is held through NaN rows, so the last result row is each column's last average
+        valid = ~np.isnan(chunk)
+        trailing = np.argmax(valid[::-1], axis=0)
+        carried = self.gap if self.gap is not None else np.zeros(columns, dtype=np.int64)
+        self.last = result[-1]
+        # Until a column has an average there is nothing to down-weight, so its gap stays 0
+        self.gap = np.where(valid.any(axis=0), trailing, np.where(np.isnan(self.last), 0, carried + len(chunk)))
+        return result
+
+
+class ChunkedMACD:
+    """
+    MACD line and signal (indicators.calculate_macd) from three chunked EWMs.
+    """
+
+    def __init__(self, short_window=12, long_window=26, signal_window=9):
+        self.short = ChunkedEWM(short_window)
+        self.long = ChunkedEWM(long_window)
+        self.signal = ChunkedEWM(signal_window)
+
+    def update(self, chunk):
+        macd = self.short.update(chunk) - self.long.update(chunk)
+        return macd, self.signal.update(macd)
+
+
+class ChunkedDrawdown:
+    """
+    Drawdown from the running peak (value / cummax - 1, NaN rows stay NaN) and its running minimum.
+    """
+
+    def __init__(self):
+        self.peak = None
+        self.max_drawdown = None
+
+    def update(self, chunk):
+        peak = self.peak if self.peak is not None else np.full((1, chunk.shape[1]), np.nan)
+        peaks = np.fmax.accumulate(np.concatenate([peak, chunk]), axis=0)[1:]
+        self.peak = peaks[-1:]
+        drawdown = chunk / peaks - 1
+        with np.errstate(invalid='ignore'):
+            lowest = np.fmin.reduce(drawdown, axis=0)
+        self.max_drawdown = lowest if self.max_drawdown is None else np.fmin(self.max_drawdown, lowest)
+        return drawdown
+
+
+class ChunkedCorrelation:
+    """
+    Pairwise-complete Pearson correlation (like DataFrame.corr) from per-chunk co-moments.
+
+    Each chunk contributes counts, means and centered co-moments for every pair of columns over the
+    rows where both are valid; chunks are merged with the parallel-variance update (Chan et al.),
+    so the running state is a few (columns x columns) matrices whatever the history length.
+    """
+
+    def __init__(self):
+        self.shift = None
+        self.count = None
+
+    def update(self, chunk):
+        found = first_valid(chunk)
+        self.shift = found if self.shift is None else np.where(np.isnan(self.shift), found, self.shift)
+        valid = ~np.isnan(chunk)
+        both = valid.astype(np.float64)
+        x = np.where(valid, chunk - np.nan_to_num(self.shift), 0.0)
+
+        count = both.T @ both
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # mean_x[i, j]: mean of column i over the rows where i and j are both valid
+            mean_x = (x.T @ both) / count
+            mean_y = mean_x.T
+            co_xy = x.T @ x - count * mean_x * mean_y
+            co_xx = (x * x).T @ both - count * mean_x * mean_x
+        co_xx = np.nan_to_num(co_xx)
+        co_xy = np.nan_to_num(co_xy)
+        mean_x = np.nan_to_num(mean_x)
+        mean_y = mean_x.T
+
+        if self.count is None:
+            self.count, self.mean_x, self.mean_y, self.co_xy, self.co_xx = count, mean_x, mean_y, co_xy, co_xx
+            return
+        total = self.count + count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(total > 0, self.count * count / total, 0.0)
+            share = np.where(total > 0, count / total, 0.0)
+        delta_x = mean_x - self.mean_x
+        delta_y = mean_y - self.mean_y
+        self.co_xy = self.co_xy + co_xy + delta_x * delta_y * weight
+        self.co_xx = self.co_xx + co_xx + delta_x * delta_x * weight
+        self.mean_x = self.mean_x + delta_x * share
+        self.mean_y = self.mean_y + delta_y * share
+        self.count = total
+
+    def result(self):
+        co_yy = self.co_xx.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = self.co_xy / np.sqrt(self.co_xx * co_yy)
+        return np.where(self.count >= 2, np.clip(correlation, -1.0, 1.0), np.nan)
+
+
+def rolling_to_files(symbol, windows, stats, output, column='Adj_Close', chunk_rows=default_chunk_rows, directory=store_directory):
+    """
+    Write each rolling statistic of one stored column to output/<stat>_<window>.npy chunk by chunk,
+    via memory-mapped output files, so neither the input nor the results are held in memory.
+    """
+    length = len(read_column(symbol, column, directory, mmap=True))
+    os.makedirs(output, exist_ok=True)
+    files = {
+        (stat, window): np.lib.format.open_memmap(os.path.join(output, f'{stat}_{window}.npy'), mode='w+', dtype=np.float64, shape=(length,))
+        for stat in stats for window in windows
+    }
+    rolling = ChunkedRolling(windows, stats)
+    start = 0
+    for chunk in symbol_chunks(symbol, column, chunk_rows, directory):
+        for stat, results in rolling.update(chunk).items():
+            for window, values in results.items():
+                files[(stat, window)][start:start + len(chunk)] = values[:, 0]
+        start += len(chunk)
+    for values in files.values():
+        values.flush()
+    return sorted(os.path.join(output, f'{stat}_{window}.npy') for stat, window in files)
+
+
+def correlation_matrix(symbols=None, field='Adj_Close', chunk_rows=default_chunk_rows, directory=store_directory):
+    """
+    Correlation of daily returns between symbols, streamed from the panel snapshot.
+    """
+    returns = ChunkedReturns()
+    correlation = ChunkedCorrelation()
+    for chunk in panel_chunks(field, symbols, chunk_rows, directory):
+        correlation.update(returns.update(chunk))
+    return correlation.result()
+
+
+def max_drawdowns(symbols=None, field='Adj_Close', chunk_rows=default_chunk_rows, directory=store_directory):
+    """
+    Largest peak-to-trough decline of each symbol's price, streamed from the panel snapshot.
+    """
+    drawdown = ChunkedDrawdown()
+    for chunk in panel_chunks(field, symbols, chunk_rows, directory):
+        drawdown.update(chunk)
+    return drawdown.max_drawdown
+
+
+def difference(values, expected):
+    """
+    Largest absolute difference between two results, or inf if they are NaN in different places.
+    """
+    if not np.array_equal(np.isnan(values), np.isnan(expected)):
+        return float('inf')
+    with np.errstate(invalid='ignore'):
+        return float(np.nanmax(np.abs(values - expected), initial=0.0))
+
+
+def check(symbols, windows, chunk_rows, directory=store_directory):
+    """
+    Run every chunked processor next to the in-memory path and report whether they agree.
+    """
+    panel = Panel.load(snapshot_path(directory))
+    symbols = symbols or panel.symbols
+    frame = panel.frame('Adj_Close', symbols)
+    values = frame.to_numpy(dtype=np.float64)
+    chunks = list(iter_chunks(values, chunk_rows))
+
+    def joined(processor):
+        return np.concatenate([processor.update(chunk) for chunk in chunks])
+
+    report = {'returns': np.array_equal(joined(ChunkedReturns()), frame.pct_change().to_numpy(), equal_nan=True)}
+    drawdown = ChunkedDrawdown()
+    report['drawdown'] = np.array_equal(joined(drawdown), (frame / frame.cummax() - 1).to_numpy(), equal_nan=True)
+
+    # The app's rolling statistics are pandas rolling (calculate_rolling_mean, calculate_bollinger_bands)
+    rolling = ChunkedRolling(windows, ('mean', 'std', 'zscore', 'min', 'max'))
+    parts = [rolling.update(chunk) for chunk in chunks]
+    reference = {
+        'mean': lambda window: frame.rolling(window).mean(),
+        'std': lambda window: frame.rolling(window).std(),
+        'zscore': lambda window: (frame - frame.rolling(window).mean()) / frame.rolling(window).std(),
+        'min': lambda window: frame.rolling(window).min(),
+        'max': lambda window: frame.rolling(window).max(),
+    }
+    for stat, compute in reference.items():
+        chunked = {window: np.concatenate([part[stat][window] for part in parts]) for window in windows}
+        if stat in ('min', 'max'):
+            report[f'rolling {stat}'] = all(np.array_equal(chunked[window], compute(window).to_numpy(), equal_nan=True) for window in windows)
+        else:
+            report[f'rolling {stat}'] = max(difference(chunked[window], compute(window).to_numpy()) for window in windows)
+
+    rsi = ChunkedRSI()
+    report['rsi'] = difference(joined(rsi), calculate_rsi(frame).to_numpy())
+
+    macd = ChunkedMACD()
+    parts = [macd.update(chunk) for chunk in chunks]
+    expected = calculate_macd(frame)
+    report['macd'] = all(
+        np.array_equal(np.concatenate([part[i] for part in parts]), expected[i].to_numpy(), equal_nan=True)
+        for i in range(2)
+    )
+
+    correlation = ChunkedCorrelation()
+    returns = ChunkedReturns()
+    for chunk in chunks:
+        correlation.update(returns.update(chunk))
+    expected = pd.DataFrame(values).pct_change().corr().to_numpy()
+    report['correlation'] = float(np.nanmax(np.abs(correlation.result() - expected)))
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Chunked (out-of-core) analytics over the columnar store.")
+    parser.add_argument('task', choices=['rolling', 'correlation', 'drawdown', 'check'])
+    parser.add_argument('symbols', nargs='*', help="Symbols to process (rolling takes exactly one)")
+    parser.add_argument('--windows', default='5,10,20,50,200', help="Comma-separated rolling windows")
+    parser.add_argument('--stats', default='mean,std', help="Rolling statistics: mean, std, var, zscore, min, max")
+    parser.add_argument('--column', default='Adj_Close', help="Stored column to read")
+    parser.add_argument('--chunk-rows', type=int, default=default_chunk_rows, help="Rows per chunk (bounds memory)")
+    parser.add_argument('--output', default='rolling-output', help="Directory for the rolling task's .npy results")
+    parser.add_argument('--store', default=store_directory, help="Columnar store directory")
+    args = parser.parse_args()
+    windows = [int(window) for window in args.windows.split(',')]
+
+    if args.task == 'rolling':
+        if len(args.symbols) != 1:
+            parser.error("rolling takes exactly one symbol")
+        for path in rolling_to_files(args.symbols[0], windows, args.stats.split(','), args.output, args.column, args.chunk_rows, args.store):
+            print(path)
+    elif args.task == 'correlation':
+        symbols = args.symbols or Panel.load(snapshot_path(args.store)).symbols
+        print(pd.DataFrame(correlation_matrix(symbols, args.column, args.chunk_rows, args.store), index=symbols, columns=symbols).round(4))
+    elif args.task == 'drawdown':
+        symbols = args.symbols or Panel.load(snapshot_path(args.store)).symbols
+        for symbol, value in zip(symbols, max_drawdowns(symbols, args.column, args.chunk_rows, args.store)):
+            print(f"{symbol}: {value:.2%}")
+    else:
+        for name, result in check(args.symbols, windows, args.chunk_rows, args.store).items():
+            print(f"{name}: {result}")
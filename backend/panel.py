@@ -0,0 +1,123 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from store import price_columns, save_array
+
+
+class Panel:
+    """
+    Dates x symbols x fields price cube, aligned once at startup.
+
+    Each field is a 2-D array (dates x symbols) so a multi-symbol request is a column slice by
+    integer position instead of a fresh index union over per-symbol frames.
+    """
+
+    def __init__(self, data, fields=price_columns):
+        self.version = None
+        self.symbols = list(data)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.fields = [field for field in fields if all(field in frame.columns for frame in data.values())]
+
+        self.dates = pd.DatetimeIndex([], name='Date')
+        for frame in data.values():
+            self.dates = self.dates.union(frame.index)
+        self.dates.name = 'Date'
+
+        # present[i, j] mirrors "symbol j has a row for date i", so slices keep the same rows
+        # the old per-request DataFrame union produced
+        self.present = np.zeros((len(self.dates), len(self.symbols)), dtype=bool)
+        positions = {}
+        for j, (symbol, frame) in enumerate(data.items()):
+            positions[symbol] = self.dates.get_indexer(frame.index)
+            self.present[positions[symbol], j] = True
+
+        self.values = {}
+        for field in self.fields:
+            # Prices keep float32 and volume keeps its integer dtype in compact mode. Integer blocks
+            # hold 0 in gaps (present says which cells are real) and only become float with NaN when
+            # a slice has gaps; mixed columns become float64
+            dtypes = {frame[field].dtype for frame in data.values()}
+            dtype = np.result_type(*dtypes) if all(dtype.kind in 'iu' for dtype in dtypes) else None
+            if dtype is None or dtype.kind not in 'iu':
+                dtype = np.dtype(np.float32 if dtypes == {np.dtype(np.float32)} else np.float64)
+            block = np.full((len(self.dates), len(self.symbols)), 0 if dtype.kind in 'iu' else np.nan, dtype=dtype)
+            for j, (symbol, frame) in enumerate(data.items()):
+                block[positions[symbol], j] = pd.to_numeric(frame[field], errors='coerce').to_numpy(dtype=dtype)
+            self.values[field] = block
+
+    def columns(self, symbols):
+        return np.array([self.symbol_index[symbol] for symbol in symbols], dtype=np.intp)
+
+    def frame(self, field, symbols):
+        """
+        Slice one field for the given symbols, dropping dates none of them trade on.
+        """
+        cols = self.columns(symbols)
+        present = self.present[:, cols]
+        rows = present.any(axis=1)
+        block = self.values[field][:, cols]
+        if rows.all():
+            return pd.DataFrame(self.with_gaps(block, present), index=self.dates, columns=list(symbols))
+        return pd.DataFrame(self.with_gaps(block[rows], present[rows]), index=self.dates[rows], columns=list(symbols))
+
+    @staticmethod
+    def with_gaps(block, present):
+        """
+        An integer block with NaN in the cells no symbol has a row for; float blocks already hold NaN there.
+        """
+        if block.dtype.kind in 'iu' and not present.all():
+            return np.where(present, block, np.nan)
+        return block
+
+    def series(self, field, symbol):
+        return self.frame(field, [symbol])[symbol]
+
+    def symbol_frame(self, symbol, fields=None):
+        """
+        One symbol's own rows for the given fields, like the per-symbol frame it was built from.
+        """
+        j = self.symbol_index[symbol]
+        rows = self.present[:, j]
+        fields = fields or self.fields
+        return pd.DataFrame({field: self.values[field][rows, j] for field in fields}, index=self.dates[rows])
+
+    def save(self, directory, version=None):
+        """
+        Write the panel as a snapshot that load() can memory-map at startup.
+        """
+        os.makedirs(directory, exist_ok=True)
+        save_array(os.path.join(directory, 'dates.npy'), self.dates.values)
+        save_array(os.path.join(directory, 'present.npy'), self.present)
+        for field, block in self.values.items():
+            save_array(os.path.join(directory, f'{field}.npy'), block)
+        meta = {'version': version, 'symbols': self.symbols, 'fields': self.fields}
+        tmp_path = os.path.join(directory, f'panel.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(directory, 'panel.json'))
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        with open(os.path.join(directory, 'panel.json')) as f:
+            meta = json.load(f)
+        mmap_mode = 'r' if mmap else None
+        panel = cls.__new__(cls)
+        panel.version = meta['version']
+        panel.symbols = meta['symbols']
+        panel.symbol_index = {symbol: i for i, symbol in enumerate(panel.symbols)}
+        panel.fields = meta['fields']
+        panel.dates = pd.DatetimeIndex(np.load(os.path.join(directory, 'dates.npy')), name='Date')
+        panel.present = np.load(os.path.join(directory, 'present.npy'), mmap_mode=mmap_mode)
+        panel.values = {field: np.load(os.path.join(directory, f'{field}.npy'), mmap_mode=mmap_mode) for field in panel.fields}
+        return panel
+
+
+def snapshot_version(directory):
+    try:
+        with open(os.path.join(directory, 'panel.json')) as f:
+            return json.load(f)['version']
+    except FileNotFoundError:
+        return None
@@ -3,6 +3,8 @@ import matplotlib.pyplot as plt
 import seaborn as sns  # Import seaborn for heatmap
 import os
 
+from rolling import RollingSums
+
 # Define the directory where CSV files are stored
 directory = "Financial Data"
 
@@ -92,10 +94,12 @@ else:
         plt.title('Correlation Matrix of Daily Returns')
         plt.show()
 
+        sums = RollingSums(adj_close)
+
         # Calculate rolling mean and rolling standard deviation with a 30-day window
         window = 30  # 30-day window
-        rolling_mean = adj_close.rolling(window=window).mean()
-        rolling_std = adj_close.rolling(window=window).std()
+        rolling_mean = sums.mean(window)
+        rolling_std = sums.std(window)
 
         # Plot rolling mean
         plt.figure(figsize=(14, 7))
@@ -159,6 +163,8 @@ else:
         window_sma = 50  # 50-day SMA
         window_ema = 50  # 50-day EMA
 
+        sma_all = sums.mean(window_sma)
+
         # Plot SMA and EMA for each stock
         plt.figure(figsize=(14, 7))
         for ticker in stock_symbols:
@@ -167,7 +173,7 @@ else:
                 adj_close[ticker].plot(label=f'{ticker} Price', alpha=0.5)
                 
                 # Plot 50-day SMA
-                adj_close[ticker].rolling(window=window_sma).mean().plot(label=f'{ticker} {window_sma}-Day SMA')
+                sma_all[ticker].plot(label=f'{ticker} {window_sma}-Day SMA')
                 
                 # Plot 50-day EMA
                 adj_close[ticker].ewm(span=window_ema, adjust=False).mean().plot(label=f'{ticker} {window_ema}-Day EMA')
@@ -183,15 +189,18 @@ else:
 
         window_bb = 20  # 20-day SMA for Bollinger Bands
 
+        bb_mean = sums.mean(window_bb)
+        bb_std = sums.std(window_bb)
+
         # Plot Bollinger Bands for each stock
         plt.figure(figsize=(14, 7))
         for ticker in stock_symbols:
             if ticker in adj_close.columns:
                 # Calculate 20-day SMA
-                sma = adj_close[ticker].rolling(window=window_bb).mean()
+                sma = bb_mean[ticker]
                 
                 # Calculate the standard deviation for the same window
-                std = adj_close[ticker].rolling(window=window_bb).std()
+                std = bb_std[ticker]
                 
                 # Calculate the upper and lower Bollinger Bands
                 upper_band = sma + (std * 2)
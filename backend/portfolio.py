@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# Rebalancing schedules: none (buy and hold), daily, or the first trading day of each week/month/quarter
+rebalance_periods = {'none': None, 'D': None, 'W': 'W-FRI', 'M': 'M', 'Q': 'Q'}
+
+
+def parse_weights(weights, symbol_count):
+    """
+    A (portfolios x symbols) float array from a list of weight rows, each normalized to sum to 1.
+    A single flat row is accepted as one portfolio.
+    """
+    try:
+        matrix = np.asarray(weights, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("'weights' must be a list of numeric rows")
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    if matrix.ndim != 2 or matrix.shape[0] == 0 or matrix.shape[1] != symbol_count:
+        raise ValueError(f"Each weights row must have one weight per symbol ({symbol_count})")
+    if not np.isfinite(matrix).all():
+        raise ValueError("Weights must be finite numbers")
+    totals = matrix.sum(axis=1)
+    if (np.abs(totals) < 1e-12).any():
+        raise ValueError("Each weights row must have a non-zero sum")
+    return matrix / totals[:, None]
+
+
+def rebalance_mask(dates, rebalance):
+    """
+    True on the dates a portfolio is reset to its target weights; the first date is always one.
+    """
+    if not isinstance(rebalance, str) or rebalance not in rebalance_periods:
+        raise ValueError(f"Invalid rebalance schedule (use one of {', '.join(rebalance_periods)})")
+    if rebalance == 'D':
+        mask = np.ones(len(dates), dtype=bool)
+    elif rebalance == 'none':
+        mask = np.zeros(len(dates), dtype=bool)
+    else:
+        periods = dates.to_period(rebalance_periods[rebalance]).asi8
+        mask = np.r_[True, periods[1:] != periods[:-1]]
+    if len(mask):
+        mask[0] = True
+    return mask
+
+
+def simulate(prices, weights, mask):
+    """
+    Equity curves, drawdowns and turnover for many portfolios at once.
+
+    prices is (dates x symbols) with no gaps, weights (portfolios x symbols) with rows summing to 1.
+    Between two rebalance dates every portfolio's holdings drift with prices, so each segment is one
+    matrix product: (price relatives since the rebalance) @ weights.T, scaled by the value at its
+    start. Turnover is the one-way trade needed to bring the drifted weights back to target.
+    """
+    dates_count, portfolio_count = len(prices), len(weights)
+    equity = np.empty((dates_count, portfolio_count))
+    turnover = np.zeros(portfolio_count)
+    value = np.ones(portfolio_count)
+    starts = np.flatnonzero(mask)
+    ends = np.r_[starts[1:], dates_count]
+    for start, end in zip(starts, ends):
+        relatives = prices[start:end] / prices[start]
+        equity[start:end] = (relatives @ weights.T) * value
+        if end < dates_count:
+            drifted = weights * (prices[end] / prices[start])
+            value = value * drifted.sum(axis=1)
+            drifted /= drifted.sum(axis=1, keepdims=True)
+            turnover += 0.5 * np.abs(weights - drifted).sum(axis=1)
+
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+    return equity, drawdown, turnover
+
+
+def evaluate(frame, weights, rebalance='M'):
+    """
+    Run every weights row over an Adj_Close frame; only dates where all symbols have a price are used.
+    Returns the dates and per-portfolio arrays, portfolios along the first axis.
+    """
+    frame = frame.dropna()
+    if len(frame) < 2:
+        raise ValueError("Not enough overlapping price history for the selected symbols")
+    weights = parse_weights(weights, frame.shape[1])
+    equity, drawdown, turnover = simulate(frame.to_numpy(dtype=np.float64), weights, rebalance_mask(frame.index, rebalance))
+
+    years = (frame.index[-1] - frame.index[0]).days / 365.25
+    return {
+        'dates': frame.index.values,
+        'weights': weights,
+        'equity': equity.T,
+        'drawdown': drawdown.T,
+        'total_return': equity[-1] - 1,
+        'max_drawdown': drawdown.min(axis=0),
+        'turnover': turnover,
+        'annual_turnover': turnover / years if years > 0 else turnover,
+    }
+
+
+def date_range(frame, start=None, end=None):
+    """
+    Restrict a frame to [start, end]; either bound may be omitted.
+    """
+    try:
+        start = pd.Timestamp(start) if start else None
+        end = pd.Timestamp(end) if end else None
+    except (TypeError, ValueError):
+        raise ValueError("'start' and 'end' must be dates (YYYY-MM-DD)")
+    return frame.loc[start:end]
@@ -0,0 +1,276 @@
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+# Rolling statistics for many windows from one pass over the data. Results follow pandas'
+# rolling(window) defaults: a window with fewer than `window` valid values is NaN, std uses ddof=1.
+
+
+def two_sum(a, b):
+    """
+    a + b as (rounded sum, exact rounding error), elementwise.
+    """
+    total = a + b
+    b_virtual = total - a
+    a_virtual = total - b_virtual
+    return total, (a - a_virtual) + (b - b_virtual)
+
+
+def compensated_cumsum(values, start=None):
+    """
+    Prefix sums along the first axis as (sums, corrections), beginning with a start row (zeros by
+    default, or the last prefix row of the previous chunk to continue a running total).
+
+    sums is a plain cumulative sum; corrections accumulates the exact rounding error of each of
+    its additions (TwoSum), so sums + corrections does not drift as the running total grows.
+    Continuing from a start row repeats exactly the additions one cumulative sum over the whole
+    series would make, so chunked prefixes are bit-identical.
+    """
+    if start is None:
+        start = (np.zeros_like(values[:1]), np.zeros_like(values[:1]))
+    sums = np.cumsum(np.concatenate([start[0], values]), axis=0)
+    # two_sum recomputes previous + value, which is exactly the addition cumsum performed
+    _, rounding = two_sum(sums[:-1], values)
+    return sums, np.cumsum(np.concatenate([start[1], rounding]), axis=0)
+
+
+def as_matrix(values):
+    """
+    A (rows x series) float64 array plus a function that wraps results back into the input's type.
+    """
+    if isinstance(values, pd.DataFrame):
+        return values.to_numpy(dtype=np.float64), lambda result: pd.DataFrame(result, index=values.index, columns=values.columns)
+    if isinstance(values, pd.Series):
+        return values.to_numpy(dtype=np.float64)[:, None], lambda result: pd.Series(result[:, 0], index=values.index, name=values.name)
+    array = np.asarray(values, dtype=np.float64)
+    if array.ndim == 1:
+        return array[:, None], lambda result: result[:, 0]
+    return array, lambda result: result
+
+
+class RollingSums:
+    """
+    Compensated prefix sums of a Series, DataFrame or array (one column per series).
+
+    Built once in O(n); afterwards every window's mean, variance and z-score is a difference of
+    two prefixes, so several windows of the same series share one build. For a single window
+    pandas' rolling is as fast, so the request-path indicators keep using it; this pays off for
+    multi-window overlays. Values are centered on each column's first valid value before summing,
+    which keeps the sum of squares from cancelling when prices sit far from zero.
+
+    To process a long history in chunks, build each chunk's sums with the previous chunk's
+    anchor and carry(): windows crossing the boundary then read the carried prefix rows, and the
+    results are bit-identical to building one RollingSums over the whole history.
+    """
+
+    def __init__(self, values, anchor=None, carry=None):
+        self.values, self.wrap = as_matrix(values)
+        valid = ~np.isnan(self.values)
+        if anchor is None:
+            first = np.argmax(valid, axis=0)
+            anchor = np.where(valid.any(axis=0), self.values[first, np.arange(self.values.shape[1])], 0.0)
+        self.anchor = anchor
+        complete = valid.all()
+        centered = self.values - self.anchor if complete else np.where(valid, self.values - self.anchor, 0.0)
+
+        # Window sums already computed, shared by mean, var and zscore of the same window
+        self.totals = {}
+        if carry is None:
+            # Prefix row i + 1 is the running total up to and including row i
+            self.offset = 1
+            self.sums = compensated_cumsum(centered)
+            self.squares = compensated_cumsum(centered * centered)
+            # Without gaps every window with a full prefix is complete, so no counts or mask are needed
+            self.gaps = not complete
+            self.counts = np.concatenate([np.zeros((1, self.values.shape[1]), dtype=np.int64), np.cumsum(valid, axis=0)]) if self.gaps else None
+            return
+        # Prefix row i + offset is the running total up to and including chunk row i
+        self.offset = len(carry['counts'])
+        self.counts = np.concatenate([carry['counts'], carry['counts'][-1] + np.cumsum(valid, axis=0)])
+        self.sums = self.extend(carry['sums'], compensated_cumsum(centered, start=tuple(part[-1:] for part in carry['sums'])))
+        self.squares = self.extend(carry['squares'], compensated_cumsum(centered * centered, start=tuple(part[-1:] for part in carry['squares'])))
+        self.gaps = not complete or bool((np.diff(carry['counts'], axis=0) != 1).any())
+
+    @staticmethod
+    def extend(carried, continued):
+        return tuple(np.concatenate([old[:-1], new]) for old, new in zip(carried, continued))
+
+    def carry(self, rows):
+        """
+        The last prefix rows a following chunk needs for windows of up to `rows` values.
+        """
+        keep = rows + 1
+        counts = self.counts
+        if counts is None:
+            # No gaps: prefix row i has counted i values
+            counts = np.repeat(np.arange(len(self.values) + 1, dtype=np.int64)[:, None], self.values.shape[1], axis=1)
+        return {
+            'counts': counts[-keep:],
+            'sums': tuple(part[-keep:] for part in self.sums),
+            'squares': tuple(part[-keep:] for part in self.squares),
+        }
+
+    def window_rows(self, window):
+        """
+        First chunk row whose window has a full prefix available, or None if there is none.
+        """
+        first = max(0, window - self.offset)
+        return first if 0 < window and first < len(self.values) else None
+
+    def window_total(self, name, window):
+        """
+        Sum of 'sums' or 'squares' over the window ending on each row (NaN before the first full
+        prefix). The two prefix rows are close once the running total is large, so their
+        difference is exact and the corrections supply the digits the running total rounded away.
+        """
+        key = (name, window)
+        if key not in self.totals:
+            sums, corrections = getattr(self, name)
+            total = np.empty(self.values.shape)
+            first = self.window_rows(window)
+            if first is None:
+                total[:] = np.nan
+            else:
+                total[:first] = np.nan
+                end, begin = slice(first + self.offset, None), slice(first + self.offset - window, len(sums) - window)
+                np.subtract(sums[end], sums[begin], out=total[first:])
+                total[first:] += corrections[end] - corrections[begin]
+            self.totals[key] = total
+        return self.totals[key]
+
+    def complete(self, window):
+        """
+        True where the window ending on that row holds `window` valid values.
+        """
+        complete = np.zeros(self.values.shape, dtype=bool)
+        first = self.window_rows(window)
+        if first is not None:
+            complete[first:] = (self.counts[first + self.offset:] - self.counts[first + self.offset - window:len(self.counts) - window]) == window
+        return complete
+
+    def masked(self, window, values):
+        """
+        values with NaN where the window is missing data (pandas' min_periods=window).
+        """
+        return np.where(self.complete(window), values, np.nan) if self.gaps else values
+
+    def centered_mean(self, window):
+        return self.masked(window, self.window_total('sums', window) / window)
+
+    def mean(self, window):
+        return self.wrap(self.centered_mean(window) + self.anchor)
+
+    def var(self, window, ddof=1):
+        if window <= ddof:
+            return self.wrap(np.full(self.values.shape, np.nan))
+        total = self.window_total('sums', window)
+        variance = (self.window_total('squares', window) - total * (total / window)) / (window - ddof)
+        # Rounding can leave a constant window a hair below zero
+        return self.wrap(self.masked(window, np.maximum(variance, 0.0)))
+
+    def std(self, window, ddof=1):
+        return np.sqrt(self.var(window, ddof))
+
+    def zscore(self, window, ddof=1):
+        """
+        How many rolling standard deviations each value sits from its rolling mean.
+        """
+        std = np.asarray(self.std(window, ddof), dtype=np.float64).reshape(self.values.shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.wrap((self.values - self.anchor - self.centered_mean(window)) / std)
+
+
+def rolling_extreme(values, window, func):
+    """
+    Rolling min (func=np.minimum) or max (np.maximum) in O(1) per row for any window size.
+
+    This is the block form of the monotonic-deque algorithm (van Herk/Gil-Werman): split the rows
+    into blocks of `window`, take running extremes forwards and backwards within each block, and
+    every window is the combination of one backward and one forward value. NaN propagates, so a
+    window containing a gap is NaN as in pandas.
+    """
+    matrix, wrap = as_matrix(values)
+    rows, columns = matrix.shape
+    result = np.full(matrix.shape, np.nan)
+    if not 0 < window <= rows:
+        return wrap(result)
+    identity = np.inf if func is np.minimum else -np.inf
+    padded = np.concatenate([matrix, np.full(((-rows) % window, columns), identity)])
+    blocks = padded.reshape(-1, window, columns)
+    forward = func.accumulate(blocks, axis=1).reshape(-1, columns)
+    backward = func.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1, columns)
+    result[window - 1:] = func(backward[:rows - window + 1], forward[window - 1:rows])
+    return wrap(result)
+
+
+def rolling_min(values, window):
+    return rolling_extreme(values, window, np.minimum)
+
+
+def rolling_max(values, window):
+    return rolling_extreme(values, window, np.maximum)
+
+
+def best_time(func, repeat=7, number=20):
+    """
+    Fastest mean time of one call in milliseconds over `repeat` rounds of `number` calls.
+    """
+    func()
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1000
+
+
+def benchmark(rows, columns, seed=0):
+    """
+    pandas rolling against RollingSums on a random walk of prices: one 20-day mean/std (the
+    request-path Bollinger Bands) and the plot.py/financial.py overlay (30-day mean/std, 50-day
+    mean, 20-day mean/std).
+    """
+    rng = np.random.default_rng(seed)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (rows, columns)), axis=0)),
+                          index=pd.date_range('2000-01-03', periods=rows, freq='B'))
+    overlay = [('mean', 30), ('std', 30), ('mean', 50), ('mean', 20), ('std', 20)]
+
+    def pandas_single():
+        return prices.rolling(20).mean(), prices.rolling(20).std()
+
+    def sums_single():
+        sums = RollingSums(prices)
+        return sums.mean(20), sums.std(20)
+
+    def pandas_overlay():
+        return [getattr(prices.rolling(window), stat)() for stat, window in overlay]
+
+    def sums_overlay():
+        sums = RollingSums(prices)
+        return [getattr(sums, stat)(window) for stat, window in overlay]
+
+    difference = max(float(np.nanmax(np.abs((ours - theirs).to_numpy())))
+                     for ours, theirs in zip(sums_overlay(), pandas_overlay()))
+    return {
+        'single pandas': best_time(pandas_single),
+        'single RollingSums': best_time(sums_single),
+        'overlay pandas': best_time(pandas_overlay),
+        'overlay RollingSums': best_time(sums_overlay),
+        'max abs difference': difference,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark RollingSums against pandas rolling.")
+    parser.add_argument('--rows', default='1227,10000,100000', help="Comma-separated row counts")
+    parser.add_argument('--columns', type=int, default=10, help="Price series per frame")
+    args = parser.parse_args()
+
+    for rows in [int(rows) for rows in args.rows.split(',')]:
+        results = benchmark(rows, args.columns)
+        timings = '  '.join(f"{name} {value:.2f} ms" for name, value in results.items() if name != 'max abs difference')
+        print(f"{rows} x {args.columns}: {timings}  max abs difference {results['max abs difference']:.1e}")
@@ -0,0 +1,113 @@
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+
+from materialize import indicator_frame, screen_fields, screen_row
+
+# Comparison operators allowed in a screen filter, e.g. "rsi < 30 and price < bollinger_lower"
+comparisons = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+token_pattern = re.compile(r'\s*(?:(<=|>=|==|!=|<|>)|([A-Za-z_][A-Za-z0-9_]*)|(-?\d+(?:\.\d*)?(?:[eE]-?\d+)?))')
+
+
+def build_screen_table(panel):
+    """
+    Latest value of every screenable field for every symbol, computed from the panel. app.py reads
+    the table materialize.py writes instead whenever the store has been materialized.
+
+    Each symbol's indicators are computed on its own rows, the series /stock/graph draws, so dates
+    only other symbols trade on never pad its windows with NaN. Returns (symbols, dates, table)
+    where table maps a field name to one value per symbol and dates holds the date each symbol's
+    values were taken from (its last row, so a symbol that stopped trading reports its final values).
+    """
+    fields = [field for field in screen_fields if field in panel.values]
+    rows = []
+    dates = []
+    for symbol in panel.symbols:
+        frame = panel.symbol_frame(symbol, ['Adj_Close'] + fields)
+        rows.append(screen_row(frame, indicator_frame(frame['Adj_Close'])))
+        dates.append(frame.index[-1])
+
+    table = {name: np.array([row[name] for row in rows], dtype=np.float64) for name in rows[0]} if rows else {}
+    return list(panel.symbols), pd.DatetimeIndex(dates), table
+
+
+def parse_operand(token, table):
+    name, number = token
+    if number:
+        return float(number)
+    if name not in table:
+        raise ValueError(f"Unknown field '{name}'. Available fields: {', '.join(sorted(table))}")
+    return table[name]
+
+
+def evaluate_filter(expression, table):
+    """
+    Evaluate a filter such as "rsi < 30 and price < bollinger_lower" over every symbol at once.
+
+    Clauses are "<field or number> <op> <field or number>", joined by 'and' / 'or' ('and' binds tighter).
+    Returns a boolean mask with one entry per symbol.
+    """
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = token_pattern.match(expression, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Cannot parse filter near '{expression[position:]}'")
+        tokens.append(match.groups())
+        position = match.end()
+
+    result = None
+    group = None
+    index = 0
+    while index < len(tokens):
+        if index + 3 > len(tokens):
+            raise ValueError("Each filter clause needs the form '<field> <op> <value>'")
+        left, op, right = tokens[index:index + 3]
+        if not op[0] or left[0] or right[0]:
+            raise ValueError("Each filter clause needs the form '<field> <op> <value>'")
+        with np.errstate(invalid='ignore'):
+            clause = np.asarray(comparisons[op[0]](parse_operand(left[1:], table), parse_operand(right[1:], table)))
+        group = clause if group is None else group & clause
+        index += 3
+
+        if index < len(tokens):
+            joiner = tokens[index][1]
+            if joiner not in ('and', 'or'):
+                raise ValueError(f"Expected 'and' or 'or' between clauses, got '{joiner or tokens[index][0] or tokens[index][2]}'")
+            if joiner == 'or':
+                result = group if result is None else result | group
+                group = None
+            index += 1
+            if index == len(tokens):
+                raise ValueError("Filter cannot end with 'and' / 'or'")
+
+    if group is None:
+        raise ValueError("Empty filter expression")
+    return group if result is None else result | group
+
+
+def screen(symbols, dates, table, expression):
+    """
+    Rows (one per matching symbol) for a filter expression, with NaN reported as None for JSON.
+    """
+    mask = evaluate_filter(expression, table)
+    mask = np.broadcast_to(mask, (len(symbols),))
+    rows = []
+    for j in np.flatnonzero(mask):
+        row = {'symbol': symbols[j], 'date': dates[j].strftime('%Y-%m-%d')}
+        for name, values in table.items():
+            value = values[j]
+            row[name] = None if np.isnan(value) else float(value)
+        rows.append(row)
+    return rows
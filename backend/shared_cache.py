@@ -0,0 +1,260 @@
+import hashlib
+import io
+import os
+import time
+import uuid
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+# Second cache tier shared by every worker (and host, with Redis). Values are bytes; keys include
+# the data version so a re-ingest never serves stale results, and entries expire after a TTL so the
+# keys of earlier versions do not pile up.
+
+# How long an entry lives, in seconds (SHARED_CACHE_TTL; 0 keeps entries forever)
+default_ttl = 24 * 3600
+
+
+class DiskCache:
+    """
+    Key-value store in a local directory, shared by every worker process on the host.
+
+    Entries older than ttl read as missing, and every prune_every writes a prune pass deletes
+    expired entries and then the oldest ones until the directory holds at most max_bytes.
+    """
+
+    def __init__(self, directory, ttl=default_ttl, max_bytes=None, lock_timeout=30, prune_every=256):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock_timeout = lock_timeout
+        self.prune_every = prune_every
+        self.writes = 0
+        self.tokens = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest[2:])
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                if self.ttl and time.time() - os.fstat(f.fileno()).st_mtime > self.ttl:
+                    expired = True
+                else:
+                    return f.read()
+        except FileNotFoundError:
+            return None
+        if expired:
+            self.remove(path)
+        return None
+
+    def set(self, key, value):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(value)
+        os.replace(tmp_path, path)
+        self.writes += 1
+        if self.writes % self.prune_every == 0:
+            self.prune()
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def prune(self):
+        """
+        Delete expired entries (and temp files left by crashed writers), then the oldest entries
+        until the cache fits in max_bytes.
+        """
+        now = time.time()
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if name.endswith('.lock') or name.endswith('.stale'):
+                    continue
+                age = now - stat.st_mtime
+                if name.endswith('.tmp'):
+                    if age > self.lock_timeout:
+                        self.remove(path)
+                elif self.ttl and age > self.ttl:
+                    self.remove(path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self.remove(path)
+                total -= size
+
+    def acquire(self, key):
+        """
+        Take the compute lock for key; a lock older than lock_timeout is treated as abandoned.
+        """
+        lock_path = self.path(key) + '.lock'
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return self.break_stale(lock_path) and self.acquire(key)
+        token = uuid.uuid4().hex
+        with os.fdopen(fd, 'w') as f:
+            f.write(token)
+        self.tokens[key] = token
+        return True
+
+    def break_stale(self, lock_path):
+        """
+        Remove an abandoned lock, returning whether the caller should try to take it again.
+
+        The lock is renamed aside first, which only one worker can do, and put back if what was
+        moved turns out to be fresh: a worker that broke the stale lock and re-locked in between.
+        """
+        try:
+            if time.time() - os.path.getmtime(lock_path) <= self.lock_timeout:
+                return False
+            aside = f"{lock_path}.{uuid.uuid4().hex}.stale"
+            os.rename(lock_path, aside)
+        except FileNotFoundError:
+            # Released in the meantime
+            return True
+        if time.time() - os.path.getmtime(aside) > self.lock_timeout:
+            os.remove(aside)
+            return True
+        try:
+            os.link(aside, lock_path)
+        except FileExistsError:
+            pass
+        os.remove(aside)
+        return False
+
+    def release(self, key):
+        # Only drop the lock if it is still ours (it may have been broken as stale and re-taken)
+        token = self.tokens.pop(key, None)
+        lock_path = self.path(key) + '.lock'
+        try:
+            with open(lock_path) as f:
+                current = f.read()
+        except FileNotFoundError:
+            return
+        if token is not None and current == token:
+            self.remove(lock_path)
+
+
+# Delete a lock only if it still holds our token, in one atomic step on the server
+release_script = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+
+class RedisCache:
+    """
+    The same interface over a Redis-protocol client (redis.Redis, or any stand-in with get/set/eval).
+    """
+
+    def __init__(self, client, prefix='stock-visualization:', ttl=default_ttl, lock_timeout=30):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.tokens = {}
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=self.ttl or None)
+
+    def acquire(self, key):
+        token = uuid.uuid4().hex
+        if self.client.set(self.prefix + key + ':lock', token, nx=True, px=self.lock_timeout * 1000):
+            self.tokens[key] = token
+            return True
+        return False
+
+    def release(self, key):
+        # Only drop the lock if it is still ours (it may have expired and been re-taken); a GET then
+        # DELETE could remove a lock another worker took in between, so the check runs server-side
+        token = self.tokens.pop(key, None)
+        if token is not None:
+            self.client.eval(release_script, 1, self.prefix + key + ':lock', token)
+
+
+def cache_from_url(url, ttl=default_ttl, max_bytes=None):
+    """
+    Build a shared cache from SHARED_CACHE-style settings: 'disk:/some/dir' or 'redis://host:6379/0'.
+    Entries expire after ttl seconds (0 or None: never); max_bytes bounds the disk cache's size,
+    Redis being bounded by its own maxmemory policy. Returns None when url is empty.
+    """
+    if not url:
+        return None
+    if url.startswith('disk:'):
+        return DiskCache(url[len('disk:'):], ttl=ttl, max_bytes=max_bytes)
+    if urlparse(url).scheme in ('redis', 'rediss', 'unix'):
+        import redis
+        return RedisCache(redis.Redis.from_url(url), ttl=ttl)
+    raise ValueError(f"Unsupported shared cache '{url}' (use disk:<dir> or redis://...)")
+
+
+def get_or_compute(cache, key, compute, wait_timeout=30, poll_interval=0.05):
+    """
+    Return the cached bytes for key, computing them at most once across every worker sharing cache.
+
+    The first worker to miss takes the key's lock and computes; the others poll until the value
+    appears (or the holder disappears and they take over). compute may return None for results
+    that must not be cached, such as errors.
+    """
+    if cache is None:
+        return compute()
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    deadline = time.monotonic() + wait_timeout
+    while True:
+        if cache.acquire(key):
+            try:
+                value = cache.get(key)
+                if value is None:
+                    value = compute()
+                    if value is not None:
+                        cache.set(key, value)
+                return value
+            finally:
+                cache.release(key)
+        if time.monotonic() > deadline:
+            return compute()
+        time.sleep(poll_interval)
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+
+def pack_series(*series):
+    """
+    Serialize Series that share one index (an indicator's outputs) into bytes.
+    """
+    buf = io.BytesIO()
+    np.savez(buf, index=series[0].index.values, **{f'values_{i}': s.to_numpy() for i, s in enumerate(series)})
+    return buf.getvalue()
+
+
+def unpack_series(value):
+    with np.load(io.BytesIO(value)) as arrays:
+        index = pd.DatetimeIndex(arrays['index'], name='Date')
+        count = len(arrays.files) - 1
+        return tuple(pd.Series(arrays[f'values_{i}'], index=index) for i in range(count))
@@ -0,0 +1,130 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Columnar price store written by ingest.py: one directory per symbol holding
+# one .npy file per column, plus a manifest.json describing the whole store.
+store_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Price Store")
+
+price_columns = ['Adj_Close', 'Close', 'High', 'Low', 'Open', 'Volume']
+
+
+def snapshot_path(directory=store_directory, compact=False):
+    """
+    Where ingest.py writes the pre-aligned panel snapshot that app.py loads at startup; the compact
+    snapshot holds the float32/integer layout COMPACT_PRICES workers use (see compact.py).
+    """
+    return os.path.join(directory, '_panel_compact' if compact else '_panel')
+
+
+def symbol_path(symbol, directory=store_directory):
+    return os.path.join(directory, symbol)
+
+
+def indicator_directory(symbol, directory=store_directory, version=None):
+    """
+    Where materialize.py writes a symbol's precomputed indicators: one subdirectory per data version,
+    holding one table per timeframe, so tables are only ever read with the prices they came from.
+    """
+    path = os.path.join(symbol_path(symbol, directory), '_indicators')
+    return path if version is None else os.path.join(path, version)
+
+
+def screen_directory(directory=store_directory, version=None):
+    """
+    Where materialize.py writes the screener's table of latest values, one subdirectory per data version.
+    """
+    path = os.path.join(directory, '_screen')
+    return path if version is None else os.path.join(path, version)
+
+
+def save_array(path, values):
+    """
+    Write an array next to its final location and swap it in, so readers never see a partial file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+
+def write_symbol(symbol, stock_data, directory=store_directory):
+    """
+    Store a Date-indexed frame as one array per column.
+    """
+    path = symbol_path(symbol, directory)
+    os.makedirs(path, exist_ok=True)
+    save_array(os.path.join(path, 'Date.npy'), stock_data.index.values.astype('datetime64[ns]'))
+    for col in stock_data.columns:
+        save_array(os.path.join(path, f'{col}.npy'), stock_data[col].to_numpy())
+
+
+def stored_columns(symbol, directory=store_directory):
+    path = symbol_path(symbol, directory)
+    names = [name[:-4] for name in os.listdir(path) if name.endswith('.npy') and name != 'Date.npy']
+    # Keep the CSV column order first, then anything added later (indicators, adjusted prices)
+    return [col for col in price_columns if col in names] + sorted(col for col in names if col not in price_columns)
+
+
+def read_column(symbol, column, directory=store_directory, mmap=False):
+    return np.load(os.path.join(symbol_path(symbol, directory), f'{column}.npy'), mmap_mode='r' if mmap else None)
+
+
+def read_symbol(symbol, directory=store_directory, columns=None, mmap=False):
+    """
+    Load a symbol back into a Date-indexed frame. With mmap=True the columns stay on disk until touched.
+    """
+    if columns is None:
+        columns = stored_columns(symbol, directory)
+    index = pd.DatetimeIndex(read_column(symbol, 'Date', directory), name='Date')
+    return pd.DataFrame({col: read_column(symbol, col, directory, mmap) for col in columns}, index=index)
+
+
+def read_manifest(directory=store_directory):
+    try:
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"version": None, "symbols": {}}
+
+
+def write_manifest(symbols, directory=store_directory):
+    """
+    Merge newly ingested symbols ({symbol: row_count}) into the manifest and bump the data version.
+    """
+    manifest = read_manifest(directory)
+    manifest['symbols'].update(symbols)
+    manifest['version'] = str(time.time_ns())
+    save_manifest(manifest, directory)
+    return manifest
+
+
+def mark_materialized(version, directory=store_directory):
+    """
+    Record that the indicator tables were rebuilt for this data version, without bumping it.
+    """
+    manifest = read_manifest(directory)
+    manifest['materialized'] = version
+    save_manifest(manifest, directory)
+
+
+def save_manifest(manifest, directory=store_directory):
+    tmp_path = os.path.join(directory, f'manifest.json.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(directory, 'manifest.json'))
+
+
+def list_symbols(directory=store_directory):
+    return sorted(read_manifest(directory)['symbols'])
+
+
+def data_version(directory=store_directory):
+    return read_manifest(directory)['version']
+
+
+def materialized_version(directory=store_directory):
+    return read_manifest(directory).get('materialized')
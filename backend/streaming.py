@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+
+# Rows encoded per chunk; memory per chunk stays constant however long the history is
+chunk_size = 10000
+
+# Accepted ?stream= values: '1' streams the regular JSON document, 'ndjson' one row per line
+stream_modes = ('1', 'ndjson')
+
+
+def chunk_values(values, date_unit='s'):
+    """
+    Python values for one chunk of an array: ISO strings for dates (to date_unit), None for NaN.
+    """
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return np.datetime_as_string(values, unit=date_unit).tolist()
+    if np.issubdtype(values.dtype, np.floating):
+        values = np.where(np.isnan(values), None, values)
+    return values.tolist()
+
+
+def encode_values(values, date_unit='s'):
+    """
+    JSON-encode one chunk of an array without the surrounding brackets.
+    """
+    return json.dumps(chunk_values(values, date_unit))[1:-1]
+
+
+def stream_json(parts, size=chunk_size, date_unit='s'):
+    """
+    Yield a JSON document piece by piece.
+
+    parts is a sequence of literal JSON fragments (str) and arrays; each array is written as a
+    JSON list, size elements at a time, so the full list never exists in memory.
+    """
+    for part in parts:
+        if isinstance(part, str):
+            yield part
+            continue
+        yield '['
+        for start in range(0, len(part), size):
+            if start:
+                yield ','
+            yield encode_values(part[start:start + size], date_unit)
+        yield ']'
+
+
+def stream_ndjson(columns, size=chunk_size, date_unit='s'):
+    """
+    Yield one JSON object per row ({name: value, ...}), size rows per chunk.
+    """
+    names = list(columns)
+    length = len(columns[names[0]]) if names else 0
+    for start in range(0, length, size):
+        chunk = [chunk_values(columns[name][start:start + size], date_unit) for name in names]
+        yield ''.join(json.dumps(dict(zip(names, row))) + '\n' for row in zip(*chunk))
@@ -1,12 +1,11 @@
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import mplfinance as mpf
 import io
 import os
 
+import admission
+
 app = Flask(__name__)
 CORS(app)
 
@@ -28,6 +27,20 @@ for symbol in stock_symbols:
     except Exception as e:
         print(f"Failed to load {symbol}: {e}")
 
+def request_cost():
+    """
+    Every chart here is a 300 dpi matplotlib render, so each one is charged at the PNG rates.
+    """
+    if request.endpoint != 'stock_graph':
+        return None
+    symbols = [symbol for symbol in request.args.get('symbols', '').split(',') if symbol in data]
+    rows = max((len(data[symbol]) for symbol in symbols), default=0)
+    kind = 'candlestick_png' if request.args.get('graph_type') == 'candlestick' else 'png'
+    return admission.estimate_cost(kind, len(symbols), rows)
+
+
+admission.install(app, request_cost)
+
 # [Previous utility functions remain the same]
 def calculate_daily_returns(adj_close):
     return adj_close.pct_change().dropna()
@@ -73,6 +86,9 @@ def stock_graph():
         if len(valid_symbols) > 1:
             return jsonify({"error": "Candlestick chart can only be generated for a single symbol."}), 400
 
+        # mplfinance pulls in matplotlib; import it on the first candlestick request, not at startup
+        import mplfinance as mpf
+
         symbol = valid_symbols[0]
         stock_data = data[symbol]
         
@@ -102,6 +118,10 @@ def stock_graph():
         buf.seek(0)
         return send_file(buf, mimetype='image/png')
 
+    # Plotting libraries are imported on the first chart request, not at startup
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     # Combine the data for the requested symbols (for non-candlestick charts)
     adj_close = pd.DataFrame({symbol: data[symbol]['Adj_Close'] for symbol in valid_symbols})
 
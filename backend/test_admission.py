@@ -0,0 +1,109 @@
+import pytest
+from flask import Flask, request
+
+import admission
+from admission import AdmissionController, TokenBucket, install
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_token_bucket_reports_the_wait_until_it_refills(clock):
+    bucket = TokenBucket(rate=10, capacity=20)
+    assert bucket.take(15) == 0
+    assert bucket.take(10) == pytest.approx(0.5)
+    clock[0] += 0.5
+    assert bucket.take(10) == 0
+
+
+def test_client_over_budget_gets_429_with_retry_after(clock):
+    controller = AdmissionController(rate=10, burst=20, max_inflight_cost=1000)
+    assert controller.admit('a', 20) == (None, 0)
+    controller.release(20)
+    # The cost is capped at the burst: 20 tokens at 10 per second is 2 seconds; another client is unaffected
+    assert controller.admit('a', 25) == (429, 2)
+    assert controller.admit('b', 5) == (None, 0)
+
+
+def test_server_at_capacity_gets_503(clock):
+    controller = AdmissionController(rate=100, burst=100, max_inflight_cost=50)
+    assert controller.admit('a', 40) == (None, 0)
+    assert controller.admit('b', 20) == (503, 1)
+    controller.release(40)
+    assert controller.admit('b', 20) == (None, 0)
+
+
+def test_request_larger_than_the_burst_is_admitted_on_a_full_bucket(clock):
+    controller = AdmissionController(rate=10, burst=20, max_inflight_cost=1000)
+    assert controller.admit('a', 500) == (None, 0)
+    controller.release(500)
+    assert controller.inflight_cost == 0
+    assert controller.admit('a', 500) == (429, 2)
+
+
+def test_least_recently_seen_clients_are_forgotten(clock):
+    controller = AdmissionController(rate=1, burst=10, max_inflight_cost=1000, max_clients=2)
+    for client in ('a', 'b', 'a', 'c'):
+        controller.admit(client, 1)
+    assert list(controller.buckets) == ['a', 'c']
+
+
+def make_app(monkeypatch, rate, burst, max_inflight_cost, trusted=''):
+    monkeypatch.setenv('RATE_LIMIT_RATE', str(rate))
+    monkeypatch.setenv('RATE_LIMIT_BURST', str(burst))
+    monkeypatch.setenv('MAX_INFLIGHT_COST', str(max_inflight_cost))
+    monkeypatch.setenv('TRUSTED_CLIENT_ID_PROXIES', trusted)
+    app = Flask(__name__)
+
+    @app.route('/cost/<int:cost>')
+    def spend(cost):
+        return 'ok'
+
+    @app.route('/health')
+    def health():
+        return 'ok'
+
+    controller = install(app, lambda: request.view_args.get('cost') if request.view_args else None)
+    return app, controller
+
+
+def test_installed_app_answers_429_and_503_with_retry_after(monkeypatch, clock):
+    app, controller = make_app(monkeypatch, rate=10, burst=20, max_inflight_cost=50)
+    client = app.test_client()
+
+    assert client.get('/cost/15').status_code == 200
+    # The cost was released when the request finished
+    assert controller.inflight_cost == 0
+
+    response = client.get('/cost/15')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json() == {"error": "Rate limit exceeded.", "retry_after": 1}
+
+    clock[0] += 10
+    controller.inflight_cost = 45
+    response = client.get('/cost/15')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json()["error"] == "Server is at capacity."
+
+    # Requests without a cost are never limited
+    assert client.get('/health').status_code == 200
+
+
+def test_client_id_header_is_honoured_only_from_trusted_proxies(monkeypatch, clock):
+    app, controller = make_app(monkeypatch, rate=1, burst=10, max_inflight_cost=1000, trusted='10.0.0.1')
+    client = app.test_client()
+
+    proxy = {'REMOTE_ADDR': '10.0.0.1'}
+    assert client.get('/cost/10', headers={'X-Client-Id': 'alice'}, environ_base=proxy).status_code == 200
+    assert client.get('/cost/10', headers={'X-Client-Id': 'bob'}, environ_base=proxy).status_code == 200
+    assert client.get('/cost/10', headers={'X-Client-Id': 'alice'}, environ_base=proxy).status_code == 429
+
+    other = {'REMOTE_ADDR': '10.0.0.2'}
+    assert client.get('/cost/10', headers={'X-Client-Id': 'carol'}, environ_base=other).status_code == 200
+    assert client.get('/cost/10', headers={'X-Client-Id': 'dave'}, environ_base=other).status_code == 429
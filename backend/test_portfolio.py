@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio import evaluate, parse_weights, rebalance_mask, simulate
+
+# Two assets over four days: A rises 10% twice then holds, B falls to 80, recovers to 90, then rises 10%
+prices = np.array([
+    [100.0, 100.0],
+    [110.0, 80.0],
+    [121.0, 90.0],
+    [121.0, 99.0],
+])
+
+
+def test_simulate_matches_a_hand_computed_rebalance():
+    weights = np.array([[0.5, 0.5]])
+    equity, drawdown, turnover = simulate(prices, weights, np.array([True, False, True, False]))
+
+    # Day 1: 0.5 * 1.1 + 0.5 * 0.8. Day 2: holdings drifted to 0.5 * 1.21 + 0.5 * 0.9 = 1.055.
+    # Day 3: rebalanced to 50/50 at 1.055, then 1.055 * (0.5 * 1.0 + 0.5 * 1.1).
+    np.testing.assert_allclose(equity[:, 0], [1.0, 0.95, 1.055, 1.055 * 1.05])
+    np.testing.assert_allclose(drawdown[:, 0], [0.0, -0.05, 0.0, 0.0], atol=1e-15)
+    # Drifted weights on day 2 are 0.605 / 1.055 and 0.45 / 1.055; half the gap to 50/50 is traded
+    np.testing.assert_allclose(turnover, [(0.605 - 0.5275) / 1.055])
+
+
+def test_simulate_buy_and_hold_never_trades():
+    weights = np.array([[0.5, 0.5], [1.0, 0.0]])
+    equity, drawdown, turnover = simulate(prices, weights, np.array([True, False, False, False]))
+
+    np.testing.assert_allclose(equity[:, 0], [1.0, 0.95, 1.055, 0.5 * 1.21 + 0.5 * 0.99])
+    np.testing.assert_allclose(equity[:, 1], prices[:, 0] / 100)
+    np.testing.assert_allclose(turnover, [0.0, 0.0])
+
+
+def test_single_asset_portfolio_never_trades_however_often_it_rebalances():
+    equity, drawdown, turnover = simulate(prices, np.array([[0.0, 1.0]]), np.ones(4, dtype=bool))
+    np.testing.assert_allclose(equity[:, 0], prices[:, 1] / 100)
+    np.testing.assert_allclose(drawdown[:, 0], [0.0, -0.2, -0.1, -0.01])
+    assert turnover[0] == 0
+
+
+def test_parse_weights_normalizes_rows():
+    np.testing.assert_allclose(parse_weights([1, 3], 2), [[0.25, 0.75]])
+    np.testing.assert_allclose(parse_weights([[2, 2], [1, 0]], 2), [[0.5, 0.5], [1.0, 0.0]])
+
+
+@pytest.mark.parametrize('weights, message', [
+    (None, "one weight per symbol"),
+    ([], "one weight per symbol"),
+    ([0.5, 0.5, 0.0], "one weight per symbol"),
+    ([[0.5, 0.5], [1.0]], "list of numeric rows"),
+    (["a", "b"], "list of numeric rows"),
+    ([float('nan'), 1.0], "finite"),
+    ([1.0, -1.0], "non-zero sum"),
+])
+def test_parse_weights_rejects_malformed_rows(weights, message):
+    with pytest.raises(ValueError, match=message):
+        parse_weights(weights, 2)
+
+
+def test_rebalance_mask_marks_the_first_trading_day_of_each_period():
+    dates = pd.DatetimeIndex(['2024-01-30', '2024-01-31', '2024-02-01', '2024-02-02', '2024-03-01'])
+    assert rebalance_mask(dates, 'M').tolist() == [True, False, True, False, True]
+    assert rebalance_mask(dates, 'none').tolist() == [True, False, False, False, False]
+    with pytest.raises(ValueError, match="Invalid rebalance"):
+        rebalance_mask(dates, 'Y')
+
+
+def test_evaluate_drops_dates_missing_a_price():
+    dates = pd.DatetimeIndex(['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05', '2024-01-08'])
+    frame = pd.DataFrame(np.insert(prices, 2, [np.nan, 50.0], axis=0), index=dates, columns=['A', 'B'])
+    result = evaluate(frame, [0.5, 0.5], rebalance='none')
+    assert len(result['dates']) == 4
+    np.testing.assert_allclose(result['total_return'], [0.5 * 1.21 + 0.5 * 0.99 - 1])
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from screener import evaluate_filter, screen
+
+
+def make_table():
+    return {
+        'rsi': np.array([20.0, 50.0, 80.0, np.nan]),
+        'price': np.array([10.0, 10.0, 30.0, 10.0]),
+        'bollinger_lower': np.array([12.0, 8.0, 25.0, 12.0]),
+    }
+
+
+def test_single_clause_compares_fields_and_numbers():
+    table = make_table()
+    assert evaluate_filter("rsi < 30", table).tolist() == [True, False, False, False]
+    assert evaluate_filter("price < bollinger_lower", table).tolist() == [True, False, False, True]
+    assert evaluate_filter("70 <= rsi", table).tolist() == [False, False, True, False]
+
+
+def test_and_binds_tighter_than_or():
+    table = make_table()
+    # rsi > 70 or (rsi < 30 and price > 20): only the overbought symbol matches
+    assert evaluate_filter("rsi > 70 or rsi < 30 and price > 20", table).tolist() == [False, False, True, False]
+    # (rsi < 30 and price > 20) or rsi > 70: the same filter with the clauses swapped
+    assert evaluate_filter("rsi < 30 and price > 20 or rsi > 70", table).tolist() == [False, False, True, False]
+    # Left-to-right evaluation would give (rsi > 70 or rsi < 30) and price < 20 instead
+    assert evaluate_filter("rsi > 70 or rsi < 30 and price < 20", table).tolist() == [True, False, True, False]
+
+
+def test_nan_never_matches():
+    table = make_table()
+    assert not evaluate_filter("rsi >= 0 or rsi < 0", table)[3]
+
+
+@pytest.mark.parametrize('expression, message', [
+    ("", "Empty filter"),
+    ("rsi <", "needs the form"),
+    ("rsi < 30 and", "cannot end with"),
+    ("rsi < 30 xor price > 5", "Expected 'and' or 'or'"),
+    ("rsi < 30 price > 5", "Expected 'and' or 'or'"),
+    ("rsi 30 <", "needs the form"),
+    ("rsi < 30 and $", "Cannot parse filter"),
+    ("volatility > 1", "Unknown field 'volatility'"),
+])
+def test_malformed_filters_raise_value_error(expression, message):
+    with pytest.raises(ValueError, match=message):
+        evaluate_filter(expression, make_table())
+
+
+def test_screen_reports_matching_rows_with_nan_as_none():
+    dates = pd.DatetimeIndex(['2024-01-02'] * 4)
+    rows = screen(['AAPL', 'MSFT', 'NVDA', 'TSLA'], dates, make_table(), "price < bollinger_lower")
+    assert [row['symbol'] for row in rows] == ['AAPL', 'TSLA']
+    assert rows[1]['rsi'] is None and rows[1]['date'] == '2024-01-02'
@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+import threading
+import time
+
+from shared_cache import DiskCache, RedisCache, get_or_compute, release_script
+
+
+class FakeRedis:
+    """
+    The part of redis.Redis that RedisCache uses, over a Manager dict so every process shares it.
+    """
+
+    def __init__(self, entries, lock):
+        self.entries = entries
+        self.lock = lock
+
+    def live(self, key):
+        entry = self.entries.get(key)
+        if entry is None or (entry[1] is not None and entry[1] < time.time()):
+            return None
+        return entry[0]
+
+    def get(self, key):
+        with self.lock:
+            return self.live(key)
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self.lock:
+            if nx and self.live(key) is not None:
+                return None
+            expires = time.time() + ex if ex else time.time() + px / 1000 if px else None
+            self.entries[key] = (value.encode() if isinstance(value, str) else value, expires)
+            return True
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def eval(self, script, numkeys, key, token):
+        # The only script RedisCache runs is the compare-and-delete in release
+        assert script == release_script and numkeys == 1
+        with self.lock:
+            if self.live(key) != token.encode():
+                return 0
+            self.entries.pop(key)
+            return 1
+
+
+def make_cache(kind, shared):
+    if kind == 'redis':
+        return RedisCache(FakeRedis(shared['entries'], shared['lock']))
+    return DiskCache(shared['directory'])
+
+
+def worker(kind, shared, results):
+    cache = make_cache(kind, shared)
+
+    def compute():
+        with shared['lock']:
+            shared['computed'].value += 1
+        time.sleep(0.3)
+        return b'result'
+
+    results.put(get_or_compute(cache, 'response:key', compute, poll_interval=0.01))
+
+
+def coalesce(kind, directory=None, processes=8):
+    with multiprocessing.Manager() as manager:
+        shared = {'entries': manager.dict(), 'lock': manager.Lock(), 'computed': manager.Value('i', 0), 'directory': directory}
+        results = manager.Queue()
+        workers = [multiprocessing.Process(target=worker, args=(kind, shared, results)) for _ in range(processes)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(30)
+        return shared['computed'].value, [results.get(timeout=5) for _ in workers]
+
+
+def test_redis_misses_compute_once_across_processes():
+    computed, results = coalesce('redis')
+    assert computed == 1
+    assert results == [b'result'] * 8
+
+
+def test_disk_misses_compute_once_across_processes(tmp_path):
+    computed, results = coalesce('disk', str(tmp_path))
+    assert computed == 1
+    assert results == [b'result'] * 8
+
+
+def test_disk_entries_expire_and_prune_to_size(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl=60, max_bytes=250, prune_every=1000)
+    for i in range(5):
+        cache.set(f'key-{i}', b'x' * 100)
+        old = time.time() - 10 + i
+        os.utime(cache.path(f'key-{i}'), (old, old))
+    os.utime(cache.path('key-0'), (time.time() - 120,) * 2)
+    assert cache.get('key-0') is None
+
+    cache.prune()
+    assert [cache.get(f'key-{i}') is not None for i in range(5)] == [False, False, False, True, True]
+
+
+def test_disk_stale_lock_is_taken_over_without_dropping_fresh_locks(tmp_path):
+    first = DiskCache(str(tmp_path), lock_timeout=5)
+    second = DiskCache(str(tmp_path), lock_timeout=5)
+    assert first.acquire('key')
+    assert not second.acquire('key')
+
+    # first's lock is abandoned: second may take it, and first's late release must leave it alone
+    stale = time.time() - 10
+    os.utime(first.path('key') + '.lock', (stale, stale))
+    assert second.acquire('key')
+    first.release('key')
+    assert not first.acquire('key')
+    second.release('key')
+    assert first.acquire('key')
+
+
+def test_redis_release_leaves_a_retaken_lock_alone():
+    client = FakeRedis({}, threading.Lock())
+    first = RedisCache(client, lock_timeout=5)
+    second = RedisCache(client, lock_timeout=5)
+    assert first.acquire('key')
+
+    # first's lock expires and second takes it: first's late release must not delete it
+    client.entries.pop(first.prefix + 'key:lock')
+    assert second.acquire('key')
+    first.release('key')
+    assert not first.acquire('key')
+    second.release('key')
+    assert first.acquire('key')
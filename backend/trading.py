@@ -1,12 +1,19 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 import pandas as pd
 import os
 import json
 from flask_cors import CORS
 
+from compression import compress_response
+from store import read_column, store_directory, symbol_path
+from streaming import stream_json, stream_modes, stream_ndjson
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend requests
 
+# Negotiated gzip/brotli on the (non-streamed) volume JSON
+app.after_request(compress_response)
+
 # Define the directory where CSV files are stored
 directory = r"C:\Users\91790\Desktop\Interactive\backend\Financial Data"
 
@@ -26,11 +33,47 @@ def load_stock_data(filepath):
     except Exception as e:
         raise ValueError(f"Error loading data: {str(e)}")
 
+def stream_trading_volume(ticker, mode):
+    """
+    Stream {"x": [...], "y": [...]} (or one {"x", "y"} row per line for mode 'ndjson') in chunks,
+    memory-mapping the columnar store when the symbol has been ingested.
+    """
+    symbol = ticker.upper()
+    if os.path.exists(os.path.join(symbol_path(symbol, store_directory), 'Date.npy')):
+        dates = read_column(symbol, 'Date', store_directory, mmap=True)
+        volume = read_column(symbol, 'Volume', store_directory, mmap=True)
+    else:
+        filepath = os.path.join(directory, f"{symbol}.csv")
+        if not os.path.exists(filepath):
+            return jsonify({"error": f"Data for {ticker} not found."}), 404
+        stock_data = load_stock_data(filepath)
+        dates = stock_data.index.to_numpy()
+        volume = stock_data['Volume'].to_numpy()
+
+    if mode == 'ndjson':
+        generator = stream_ndjson({"x": dates, "y": volume}, date_unit='D')
+        return Response(stream_with_context(generator), mimetype='application/x-ndjson')
+    generator = stream_json(['{"x": ', dates, ', "y": ', volume, '}'], date_unit='D')
+    return Response(stream_with_context(generator), mimetype='application/json')
+
+
 @app.route('/api/stocks/<ticker>/volume', methods=['GET'])
 def get_trading_volume(ticker):
     """
     Return the stock trading volume data for a given stock ticker in JSON format for Plotly.
+    ?stream=1 streams the same document in chunks; ?stream=ndjson streams one row per line.
     """
+    # CSVs and store directories are named by the upper-case symbol, streamed or not
+    ticker = ticker.upper()
+    stream = request.args.get('stream')
+    if stream is not None and stream not in stream_modes:
+        return jsonify({"error": f"stream must be one of {', '.join(stream_modes)}."}), 400
+    if stream:
+        try:
+            return stream_trading_volume(ticker, stream)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
     filepath = os.path.join(directory, f"{ticker}.csv")
     if not os.path.exists(filepath):
         return jsonify({"error": f"Data for {ticker} not found."}), 404
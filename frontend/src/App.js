@@ -20,21 +20,18 @@ const App = () => {
     setError(null);
 
     try {
-      let response;
+      // A single chart is one cacheable GET (no CORS preflight), candlestick and volume included
+      const view = graphType === "trading_volume" ? "volume" : graphType;
+      const response = await axios.get("http://127.0.0.1:5000/stock/graph", {
+        params: { symbols, graph_type: view },
+      });
 
       if (graphType === "candlestick") {
-        // Fetch candlestick data from the backend
-        response = await axios.get(
-          `http://127.0.0.1:5002/api/stocks/${symbols}/candlestick`
-        );
-
-        // Assuming response.data returns candlestick data in this format
-        const { dates, open, high, low, close } = response.data.data[0];
-        console.log(response.data.data);
+        const { x, open, high, low, close } = response.data.data[0];
 
         const plotlyData = [
           {
-            x: dates, // Dates for the x-axis
+            x: x, // Dates for the x-axis
             open: open,
             high: high,
             low: low,
@@ -57,12 +54,6 @@ const App = () => {
 
         setPlotData({ data: plotlyData, layout });
       } else if (graphType === "trading_volume") {
-        // Fetch trading volume data from the backend (Flask API running on port 5003)
-        response = await axios.get(
-          `http://127.0.0.1:5003/api/stocks/${symbols}/volume`
-        );
-
-        // Assuming response.data returns the volume data with x as date and y as volume
         const { x, y } = response.data;
 
         const plotlyData = [
@@ -86,11 +77,6 @@ const App = () => {
 
         setPlotData({ data: plotlyData, layout });
       } else {
-        // Fetch other graph data from the backend
-        response = await axios.get("http://127.0.0.1:5000/stock/graph", {
-          params: { symbols, graph_type: graphType },
-        });
-
         setPlotData(response.data);
       }
     } catch (err) {